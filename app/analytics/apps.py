@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+from django.db.models.signals import pre_save, post_save
+
+
+class AnalyticsConfig(AppConfig):
+    name = 'analytics'
+
+    def ready(self):
+        """Connect signal receivers"""
+        from core.signals import post_bulk_create
+        from .rollups import ROLLUPS
+        from .signals import add_bulk_created, remember_rollup_key, \
+            update_rollup
+        for model in ROLLUPS:
+            pre_save.connect(remember_rollup_key, sender=model)
+            post_save.connect(update_rollup, sender=model)
+        post_bulk_create.connect(add_bulk_created)
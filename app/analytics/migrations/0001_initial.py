@@ -0,0 +1,39 @@
+# Generated by Django 2.2.28 on 2026-10-18 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyVisitCount',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MedicinePrescriptionCount',
+            fields=[
+                ('medicine', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WeeklyNewPatientCount',
+            fields=[
+                ('week', models.DateField(primary_key=True, serialize=False)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='medicineprescriptioncount',
+            index=models.Index(fields=['count'], name='medicine_count_idx'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import DailyVisitCount, MedicinePrescriptionCount, \
+    Prescription, User, Visit, WeeklyNewPatientCount
+
+
+Rollup = namedtuple('Rollup', ('model', 'field', 'get_key', 'tracked'))
+
+
+def get_visit_day(visit):
+    """Return day of visit"""
+    return timezone.localdate(visit.visited_at)
+
+
+def get_medicine(prescription):
+    """Return prescribed medicine"""
+    return prescription.medicine
+
+
+def get_joining_week(user):
+    """Return monday of the week a patient joined"""
+    if user.group != 'patient':
+        return None
+    day = timezone.localdate(user.created_at)
+    return day - timedelta(days=day.weekday())
+
+
+ROLLUPS = {
+    Visit: Rollup(DailyVisitCount, 'date', get_visit_day,
+                  {'visited_at', 'deleted_at'}),
+    Prescription: Rollup(MedicinePrescriptionCount, 'medicine', get_medicine,
+                         {'medicine', 'deleted_at'}),
+    User: Rollup(WeeklyNewPatientCount, 'week', get_joining_week,
+                 {'group', 'deleted_at'}),
+}
+
+PATIENT_RECORDS = (Visit, Prescription)
+
+
+def get_key(instance):
+    """Return rollup key counting instance, None when not counted"""
+    if instance.deleted_at is not None:
+        return None
+    return ROLLUPS[type(instance)].get_key(instance)
+
+
+def is_tracked(model, update_fields):
+    """Return whether a save of update_fields may move rollup counts"""
+    return update_fields is None or bool(
+        set(update_fields) & ROLLUPS[model].tracked
+    )
+
+
+def add(model, counts):
+    """Add counts per key to rollup of model"""
+    rollup = ROLLUPS[model]
+    for key, delta in counts.items():
+        if key is None or not delta:
+            continue
+        rows = rollup.model.objects.filter(**{rollup.field: key})
+        if rows.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                rollup.model.objects.create(**{rollup.field: key,
+                                               'count': delta})
+        except IntegrityError:
+            rows.update(count=F('count') + delta)
+
+
+def count(model, instances):
+    """Return counts per rollup key of instances"""
+    return Counter(get_key(instance) for instance in instances)
+
+
+def remove_patient_records(patient):
+    """Uncount records hidden along with a deleted patient"""
+    for model in PATIENT_RECORDS:
+        add(model, {key: -value for key, value in count(
+            model, model.all_objects.filter(patient=patient,
+                                            deleted_at__isnull=True)
+        ).items()})
@@ -0,0 +1,31 @@
+from rest_framework import serializers
+
+from core.models import DailyVisitCount, MedicinePrescriptionCount, \
+    WeeklyNewPatientCount
+
+
+class DailyVisitCountSerializer(serializers.ModelSerializer):
+    """Serializer for DailyVisitCount model"""
+
+    class Meta:
+        model = DailyVisitCount
+        fields = ('date', 'count')
+        read_only_fields = fields
+
+
+class MedicinePrescriptionCountSerializer(serializers.ModelSerializer):
+    """Serializer for MedicinePrescriptionCount model"""
+
+    class Meta:
+        model = MedicinePrescriptionCount
+        fields = ('medicine', 'count')
+        read_only_fields = fields
+
+
+class WeeklyNewPatientCountSerializer(serializers.ModelSerializer):
+    """Serializer for WeeklyNewPatientCount model"""
+
+    class Meta:
+        model = WeeklyNewPatientCount
+        fields = ('week', 'count')
+        read_only_fields = fields
@@ -0,0 +1,36 @@
+from core.models import User
+
+from . import rollups
+
+
+def remember_rollup_key(sender, instance, update_fields=None, raw=False,
+                        **kwargs):
+    """Keep rollup key of the stored row before it is overwritten"""
+    instance._previous_rollup_key = None
+    if raw or instance._state.adding or \
+            not rollups.is_tracked(sender, update_fields):
+        return
+    previous = sender._base_manager.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._previous_rollup_key = rollups.get_key(previous)
+
+
+def update_rollup(sender, instance, update_fields=None, raw=False,
+                  **kwargs):
+    """Move instance between rollup keys when its key changed"""
+    if raw or not rollups.is_tracked(sender, update_fields):
+        return
+    previous = getattr(instance, '_previous_rollup_key', None)
+    current = rollups.get_key(instance)
+    if previous == current:
+        return
+    rollups.add(sender, {previous: -1, current: 1})
+    if sender is User and previous is not None and \
+            instance.deleted_at is not None:
+        rollups.remove_patient_records(instance)
+
+
+def add_bulk_created(sender, instances, **kwargs):
+    """Count instances created in bulk"""
+    if sender in rollups.ROLLUPS:
+        rollups.add(sender, rollups.count(sender, instances))
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import utils
+
+
+ANALYTICS_VIEW = reverse('analytics:analytics-view')
+VISIT_VIEW = reverse('record:visit-view')
+VISIT_BULK = reverse('record:visit-bulk')
+PRESCRIPTION_VIEW = reverse('record:prescription-view')
+
+
+def visit_detail(pk):
+    """Creates VISIT_DETAIL"""
+    return reverse('record:visit-detail', args=[pk, ])
+
+
+def user_detail(pk):
+    """Creates USER_DETAIL"""
+    return reverse('user:user-detail', args=[pk, ])
+
+
+class AnalyticsPublicApiTests(TestCase):
+    """Tests for Analytics Public API"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_analytics_get(self):
+        """Test that get method is not allowed"""
+        res = self.client.get(ANALYTICS_VIEW)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_analytics_get_not_admin(self):
+        """Test that only admins see analytics"""
+        self.client.force_authenticate(
+            user=utils.sample_user(group='doctor')
+        )
+        res = self.client.get(ANALYTICS_VIEW)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AnalyticsPrivateApiTests(TestCase):
+    """Tests for rollups maintained on record writes"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = utils.sample_user(cnic='sample_admin', group='admin')
+        self.client.force_authenticate(user=self.admin)
+        self.patient = utils.sample_user(cnic='sample_patient',
+                                         group='patient')
+        self.day = timezone.make_aware(datetime(2026, 10, 14, 10))
+
+    def get_analytics(self, **params):
+        """Return analytics, served without scanning records"""
+        with self.assertNumQueries(3):
+            res = self.client.get(ANALYTICS_VIEW, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def post_visit(self, visited_at):
+        """Create visit of patient through the API"""
+        res = self.client.post(VISIT_VIEW, {'patient_id': self.patient.id,
+                                            'visited_at': visited_at})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data['id']
+
+    def test_daily_visits(self):
+        """Test that visits are counted per day as they change"""
+        first = self.post_visit(self.day)
+        self.post_visit(self.day)
+        self.client.post(VISIT_BULK, [
+            {'patient_id': str(self.patient.id),
+             'visited_at': (self.day + timedelta(days=1)).isoformat()}
+        ], format='json')
+        self.assertEqual(self.get_analytics()['daily_visits'], [
+            {'date': '2026-10-14', 'count': 2},
+            {'date': '2026-10-15', 'count': 1},
+        ])
+
+        self.client.patch(visit_detail(first), {
+            'visited_at': self.day + timedelta(days=1)
+        })
+        self.assertEqual(self.get_analytics()['daily_visits'], [
+            {'date': '2026-10-14', 'count': 1},
+            {'date': '2026-10-15', 'count': 2},
+        ])
+
+        self.client.delete(visit_detail(first))
+        self.assertEqual(self.get_analytics(start='2026-10-15')[
+            'daily_visits'
+        ], [{'date': '2026-10-15', 'count': 1}])
+
+    def test_prescriptions_by_medicine(self):
+        """Test that prescriptions are counted per medicine"""
+        for medicine in ('Ibuprofen', 'Amoxicillin', 'Ibuprofen'):
+            self.client.post(PRESCRIPTION_VIEW, {
+                'patient_id': self.patient.id, 'medicine': medicine
+            })
+        self.assertEqual(self.get_analytics()['prescriptions_by_medicine'], [
+            {'medicine': 'Ibuprofen', 'count': 2},
+            {'medicine': 'Amoxicillin', 'count': 1},
+        ])
+
+    def test_weekly_new_patients(self):
+        """Test that patients are counted per joining week"""
+        utils.sample_user(cnic='other_patient', group='patient')
+        week = timezone.localdate()
+        week -= timedelta(days=week.weekday())
+        self.assertEqual(self.get_analytics()['weekly_new_patients'], [
+            {'week': week.isoformat(), 'count': 2}
+        ])
+
+    def test_patient_delete(self):
+        """Test that deleted patients & their records are uncounted"""
+        self.post_visit(self.day)
+        self.client.post(PRESCRIPTION_VIEW, {
+            'patient_id': self.patient.id, 'medicine': 'Ibuprofen'
+        })
+        self.client.delete(user_detail(self.patient.id))
+
+        data = self.get_analytics()
+        self.assertEqual(data['daily_visits'], [])
+        self.assertEqual(data['prescriptions_by_medicine'], [])
+        self.assertEqual(data['weekly_new_patients'], [])
+
+    def test_invalid_date(self):
+        """Test that malformed dates are rejected"""
+        res = self.client.get(ANALYTICS_VIEW, {'start': 'monday'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('start', res.data)
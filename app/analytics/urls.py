@@ -0,0 +1,27 @@
+from django.urls import path, include
+
+from rest_framework.routers import Route
+
+from app.urls import router
+from . import views
+
+app_name = 'analytics'
+
+router.routes += [
+    # Analytics View Route
+    Route(
+        url=r'^analytics{trailing_slash}$',
+        mapping={
+            'get': 'view_analytics'
+        },
+        name='analytics-view',
+        detail=False,
+        initkwargs={'suffix': 'View'}
+    )
+]
+
+router.register('analytics', views.AnalyticsViewSet, basename='analytics')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,61 @@
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateField
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from . import serializers
+from core.authentication import CachedTokenAuthentication
+from core.models import DailyVisitCount, MedicinePrescriptionCount, \
+    WeeklyNewPatientCount
+from core.permissions import IsAdmin
+
+
+class AnalyticsViewSet(viewsets.GenericViewSet):
+    """View set for clinic analytics served from rollups"""
+
+    authentication_classes = [CachedTokenAuthentication, ]
+
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    medicine_limit = 100
+
+    def get_date(self, name):
+        """Return date query param, if any"""
+        value = self.request.GET.get(name, None)
+        if value is None or value == '':
+            return None
+        try:
+            return DateField().to_internal_value(value)
+        except ValidationError as error:
+            raise ValidationError({name: error.detail})
+
+    def view_analytics(self, request, *args, **kwargs):
+        """Return daily visits, weekly new patients & top medicines"""
+        start = self.get_date('start')
+        end = self.get_date('end')
+
+        visits = DailyVisitCount.objects.filter(count__gt=0)
+        patients = WeeklyNewPatientCount.objects.filter(count__gt=0)
+        if start is not None:
+            visits = visits.filter(date__gte=start)
+            patients = patients.filter(week__gte=start)
+        if end is not None:
+            visits = visits.filter(date__lte=end)
+            patients = patients.filter(week__lte=end)
+        medicines = MedicinePrescriptionCount.objects.filter(
+            count__gt=0
+        ).order_by('-count', 'medicine')[:self.medicine_limit]
+
+        return Response({
+            'daily_visits': serializers.DailyVisitCountSerializer(
+                visits.order_by('date'), many=True
+            ).data,
+            'weekly_new_patients': serializers.WeeklyNewPatientCountSerializer(
+                patients.order_by('week'), many=True
+            ).data,
+            'prescriptions_by_medicine':
+                serializers.MedicinePrescriptionCountSerializer(
+                    medicines, many=True
+                ).data,
+        })
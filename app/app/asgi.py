@@ -0,0 +1,142 @@
+"""
+ASGI config for app project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Django 2.2 ships no ASGI handler, so the WSGI application is adapted here.
+Each request is handed to a thread pool of ASGI_THREADS threads (default 4),
+keeping blocking ORM work off the event loop while serving requests
+concurrently.
+"""
+
+import asyncio
+import os
+import sys
+
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('ASGI_THREADS', 4)),
+    thread_name_prefix='asgi'
+)
+
+
+class ThreadPoolWsgiToAsgi:
+    """WSGI application served concurrently over ASGI"""
+
+    def __init__(self, wsgi_application, executor=executor):
+        self.wsgi_application = wsgi_application
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported scope type {scope['type']}")
+
+        body = SpooledTemporaryFile(max_size=65536)
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body', False):
+                    break
+            body.seek(0)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.run, scope, body,
+                                       send, loop)
+        finally:
+            body.close()
+
+    @staticmethod
+    async def lifespan(receive, send):
+        """Acknowledge server startup & shutdown"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def run(self, scope, body, send, loop):
+        """Call WSGI application in a pool thread, sending its response"""
+        response = {}
+
+        def send_message(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin1'),
+                             value.encode('latin1'))
+                            for name, value in headers],
+            }
+
+        def send_start():
+            if not response.get('sent'):
+                response['sent'] = True
+                send_message(response['start'])
+
+        result = self.wsgi_application(self.get_environ(scope, body),
+                                       start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    send_start()
+                    send_message({'type': 'http.response.body',
+                                  'body': chunk, 'more_body': True})
+            send_start()
+            send_message({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+    @staticmethod
+    def get_environ(scope, body):
+        """Return WSGI environ of ASGI http scope"""
+        script_name = scope.get('root_path', '')
+        path_info = scope['path']
+        if path_info.startswith(script_name):
+            path_info = path_info[len(script_name):]
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': script_name.encode('utf8').decode('latin1'),
+            'PATH_INFO': path_info.encode('utf8').decode('latin1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+        for name, value in scope.get('headers', ()):
+            name = name.decode('latin1').upper().replace('-', '_')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            value = value.decode('latin1')
+            environ[name] = f'{environ[name]},{value}' \
+                if name in environ else value
+        return environ
+
+
+application = ThreadPoolWsgiToAsgi(get_wsgi_application())
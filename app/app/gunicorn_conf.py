@@ -0,0 +1,129 @@
+"""
+Gunicorn config for app project.
+
+Run with ``gunicorn -c python:app.gunicorn_conf app.wsgi``. Workers are
+sized from the CPUs available to the process, capped so their database
+connections fit GUNICORN_DB_CONNECTIONS; every setting can be overridden
+through the GUNICORN_* environment variables. Set
+GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker and serve
+``app.asgi:application`` to run the ASGI entry point instead.
+"""
+
+import os
+import shutil
+import tempfile
+
+
+def cpu_count():
+    """Return CPUs available to this process"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def env_bool(name, default):
+    """Return boolean environment variable"""
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+
+def connections_per_worker():
+    """Return threads of a worker, each holding a database connection"""
+    if worker_class == 'gthread':
+        return threads
+    if worker_class.startswith('uvicorn.'):
+        return int(os.environ.get('ASGI_THREADS', 4))
+    return 1
+
+
+# Persistent connections of all workers must fit the server's
+# max_connections (100 by default on PostgreSQL), leaving room for
+# migrations, management commands & superusers
+db_connections = int(os.environ.get('GUNICORN_DB_CONNECTIONS', 80))
+
+workers = int(os.environ.get('GUNICORN_WORKERS', max(1, min(
+    cpu_count() * 2 + 1, db_connections // connections_per_worker()
+))))
+
+# Import the project once in the master and share it across forks
+preload_app = env_bool('GUNICORN_PRELOAD', True)
+
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers to bound memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+errorlog = os.environ.get('GUNICORN_ERRORLOG', '-')
+
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+# Workers export their metrics here, merged by whichever worker is scraped
+os.environ.setdefault('METRICS_DIR', os.path.join(
+    tempfile.gettempdir(), f'gunicorn-metrics-{os.getpid()}'
+))
+
+# Caches holding state every worker must see, e.g. evicted tokens
+SHARED_CACHE_SETTINGS = ('TOKEN_CACHE_ALIAS', 'REPLICA_PIN_CACHE_ALIAS',
+                         'RESPONSE_CACHE_ALIAS')
+
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def on_starting(server):
+    """Refuse per process caches for state shared by several workers"""
+    if server.cfg.workers < 2:
+        return
+    from django.conf import settings
+    for name in SHARED_CACHE_SETTINGS:
+        if name == 'REPLICA_PIN_CACHE_ALIAS' and \
+                not settings.DATABASE_REPLICAS:
+            continue
+        alias = getattr(settings, name)
+        if settings.CACHES[alias]['BACKEND'] == LOCAL_CACHE_BACKEND:
+            raise RuntimeError(
+                f'{name} cache "{alias}" is local to each of the '
+                f'{server.cfg.workers} workers, configure a shared backend '
+                f'or set GUNICORN_WORKERS=1'
+            )
+
+
+def post_fork(server, worker):
+    """Never share database connections opened by the master, start
+    exporting metrics of the worker"""
+    from django.conf import settings
+    from django.db import connections
+    connections.close_all()
+    if settings.METRICS_ENABLED:
+        from core import stats
+        stats.start_exporter(settings.METRICS_DIR)
+
+
+def worker_exit(server, worker):
+    """Export final metrics of the exiting worker"""
+    from django.conf import settings
+    if settings.METRICS_ENABLED:
+        from core import stats
+        stats.dump(settings.METRICS_DIR)
+
+
+def child_exit(server, worker):
+    """Keep metrics of exited workers in the archive"""
+    directory = os.environ['METRICS_DIR']
+    if os.path.isdir(directory):
+        from core import stats
+        stats.archive(directory, worker.pid)
+
+
+def on_exit(server):
+    """Remove exported metrics"""
+    shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
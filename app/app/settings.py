@@ -42,10 +42,13 @@ INSTALLED_APPS = [
     'corsheaders',
     'core',
     'user',
-    'record'
+    'record',
+    'analytics'
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -80,12 +83,60 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# Postgres is used whenever DB_HOST is set, SQLite otherwise. Connections
+# persist for DB_CONN_MAX_AGE seconds. With DB_CONN_HEALTH_CHECKS on they
+# are pinged at the start of a request after errors, or once every
+# DB_CONN_HEALTH_CHECK_INTERVAL seconds. Set DB_POOLER=transaction when
+# connecting through a transaction pooler such as PgBouncer.
+
+if os.environ.get('DB_HOST'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'HOST': os.environ.get('DB_HOST'),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'NAME': os.environ.get('DB_NAME'),
+            'USER': os.environ.get('DB_USER'),
+            'PASSWORD': os.environ.get('DB_PASS'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': os.environ.get(
+                'DB_CONN_HEALTH_CHECKS', 'true'
+            ).lower() in ('1', 'true', 'yes'),
+            'CONN_HEALTH_CHECK_INTERVAL': int(os.environ.get(
+                'DB_CONN_HEALTH_CHECK_INTERVAL', 30
+            )),
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get(
+                'DB_POOLER', ''
+            ) == 'transaction',
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        }
+    }
+
+# Read replicas
+# Comma separated DB_REPLICA_HOSTS add replicas of the Postgres database.
+# Reads of safe requests are spread over them, clients are pinned to
+# primary for REPLICA_PIN_SECONDS after a write or login to read their own
+# writes. Pins are kept in the default cache, which must be shared by all
+# workers.
+
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.environ.get(
+        'DB_REPLICA_HOSTS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dict(DATABASES['default'], HOST=host,
+                            TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+REPLICA_PIN_CACHE_ALIAS = 'default'
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
 
 
 # Password validation
@@ -107,6 +158,34 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# First hasher of PASSWORD_HASHER is used for new passwords, the rest
+# remain available to verify & upgrade existing ones.
+
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+}
+
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[name] for name in os.environ.get(
+        'PASSWORD_HASHERS', 'pbkdf2,argon2,bcrypt'
+    ).split(',')
+]
+
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 150000)
+)
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 512)
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 2)
+)
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
 
@@ -140,3 +219,52 @@ AUTH_USER_MODEL = 'user.User'
 CORS_ORIGIN_WHITELIST = [
     "http://localhost:4200",
 ]
+
+# Rest Framework
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('PAGE_SIZE', 50)),
+}
+
+# Cache
+# Local memory caches are per process. Serving with several workers needs
+# a shared backend, e.g. CACHE_BACKEND set to memcached as in docker-compose.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    'responses': {
+        'BACKEND': os.environ.get(
+            'RESPONSE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('RESPONSE_CACHE_LOCATION', 'responses'),
+        'KEY_PREFIX': 'responses',
+    }
+}
+
+# Token authentication cache
+
+TOKEN_CACHE_ALIAS = 'default'
+TOKEN_CACHE_TIMEOUT = int(os.environ.get('TOKEN_CACHE_TIMEOUT', 300))
+
+# Patient scoped list response cache
+
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Route metrics exposed at /metrics
+
+METRICS_ENABLED = os.environ.get(
+    'METRICS_ENABLED', 'false'
+).lower() in ('1', 'true', 'yes')
+
+# Directory where each process exports its metrics, merged on scrape. Set by
+# the gunicorn config, empty when serving from a single process.
+
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
@@ -22,6 +22,8 @@ from django.conf import settings
 from rest_framework.response import Response
 from rest_framework.routers import DefaultRouter, APIRootView
 
+from core.views import metrics
+
 
 class MARSAPIRootView(APIRootView):
     """Custom API root view for MARS"""
@@ -52,6 +54,8 @@ router = Router()
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
     path('api/', include('user.urls')),
-    path('api/', include('record.urls'))
+    path('api/', include('record.urls')),
+    path('api/', include('analytics.urls'))
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
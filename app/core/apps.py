@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        """Connect signal receivers"""
+        from .db import close_unhealthy_connections
+        request_started.connect(close_unhealthy_connections)
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from . import stats
+
+
+hits = stats.counter('token_cache_hits_total',
+                     'Token lookups served from cache')
+misses = stats.counter('token_cache_misses_total',
+                       'Token lookups served from database')
+
+
+def get_token_cache():
+    """Return cache configured for token lookups"""
+    return caches[settings.TOKEN_CACHE_ALIAS]
+
+
+def get_cache_key(key):
+    """Return cache key of token"""
+    return f'auth-token:{key}'
+
+
+def invalidate_user_tokens(user):
+    """Evict cached tokens of user"""
+    keys = Token.objects.filter(user=user).values_list('key', flat=True)
+    get_token_cache().delete_many([get_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication with cached token & user lookups"""
+
+    def authenticate_credentials(self, key):
+        """Serve credentials from cache, fall back to database"""
+        cache = get_token_cache()
+        credentials = cache.get(get_cache_key(key))
+        if credentials is not None:
+            hits.increment()
+            return credentials
+
+        misses.increment()
+        credentials = super(CachedTokenAuthentication,
+                            self).authenticate_credentials(key)
+        cache.set(get_cache_key(key), credentials,
+                  settings.TOKEN_CACHE_TIMEOUT)
+        return credentials
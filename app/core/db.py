@@ -0,0 +1,27 @@
+import time
+
+from django.db import connections
+
+
+def close_unhealthy_connections(**kwargs):
+    """Close persistent connections which stopped responding
+
+    Connections are pinged after errors occurred on them, otherwise at most
+    once per CONN_HEALTH_CHECK_INTERVAL seconds.
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        if not connection.settings_dict.get('CONN_HEALTH_CHECKS', False):
+            continue
+        interval = connection.settings_dict.get(
+            'CONN_HEALTH_CHECK_INTERVAL', 30
+        )
+        checked_at = getattr(connection, 'health_checked_at', None)
+        if not connection.errors_occurred and checked_at is not None and \
+                now - checked_at < interval:
+            continue
+        connection.health_checked_at = now
+        if not connection.is_usable():
+            connection.close()
@@ -0,0 +1,142 @@
+import csv
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from core import models
+from core.signals import post_bulk_create
+
+
+ROLE_MODELS = {
+    'patient': models.Patient,
+    'nurse': models.Nurse,
+    'doctor': models.Doctor,
+    'admin': models.Admin,
+}
+
+REQUIRED_FIELDS = ('cnic', 'password', 'group')
+
+USER_FIELDS = ('email', 'contact', 'emergency_contact', 'first_name',
+               'middle_name', 'last_name', 'city', 'country', 'address',
+               'gender')
+
+
+class Command(BaseCommand):
+    """Django command to provision users from a csv file in batches"""
+
+    help = (
+        "Creates users listed in a csv file with cnic, password & group "
+        "columns, hashing passwords in a process pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="Path of csv file")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Users written per transaction")
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help="Processes used to hash passwords")
+
+    def handle(self, *args, **options):
+        """Command logic"""
+        batch_size = options['batch_size']
+        workers = options['workers']
+
+        try:
+            with open(options['file'], newline='') as file:
+                rows = self.read_rows(file)
+        except OSError as error:
+            raise CommandError(error)
+
+        created = skipped = 0
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers,
+                                           initializer=django.setup)
+        try:
+            for start in range(0, len(rows), batch_size):
+                batch_created, batch_skipped = self.provision(
+                    rows[start:start + batch_size], executor, workers
+                )
+                created += batch_created
+                skipped += batch_skipped
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} users provisioned, {skipped} duplicates skipped'
+        ))
+
+    @staticmethod
+    def read_rows(file):
+        """Return rows of csv file, rejecting incomplete ones up front"""
+        reader = csv.DictReader(file)
+        missing = [field for field in REQUIRED_FIELDS
+                   if field not in (reader.fieldnames or ())]
+        if missing:
+            raise CommandError(f"Missing columns: {', '.join(missing)}")
+
+        rows = []
+        for row in reader:
+            for field in REQUIRED_FIELDS:
+                if not (row.get(field) or '').strip():
+                    raise CommandError(
+                        f'Line {reader.line_num}: {field} is required'
+                    )
+            if row['group'] not in ROLE_MODELS:
+                raise CommandError(
+                    f"Line {reader.line_num}: invalid group "
+                    f"{row['group']!r}"
+                )
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def provision(rows, executor, workers):
+        """Create users & roles of a batch, returning (created, skipped)"""
+        seen = set(models.User.all_objects.filter(
+            cnic__in=[row['cnic'] for row in rows]
+        ).values_list('cnic', flat=True))
+        unique = []
+        for row in rows:
+            if row['cnic'] not in seen:
+                seen.add(row['cnic'])
+                unique.append(row)
+        skipped = len(rows) - len(unique)
+        rows = unique
+
+        passwords = [row['password'] for row in rows]
+        if executor is None:
+            hashed = map(make_password, passwords)
+        else:
+            hashed = executor.map(
+                make_password, passwords,
+                chunksize=max(1, len(passwords) // (workers * 4))
+            )
+
+        users = []
+        roles = {group: [] for group in ROLE_MODELS}
+        for row, password in zip(rows, hashed):
+            group = row['group']
+            role = ROLE_MODELS[group]()
+            roles[group].append(role)
+            users.append(models.User(
+                cnic=row['cnic'], password=password, group=group,
+                **{group: role},
+                **{field: row[field] for field in USER_FIELDS
+                   if row.get(field)}
+            ))
+
+        with transaction.atomic():
+            for group, instances in roles.items():
+                ROLE_MODELS[group].objects.bulk_create(instances)
+            models.User.objects.bulk_create(users)
+            post_bulk_create.send(sender=models.User, instances=users)
+
+        return len(users), skipped
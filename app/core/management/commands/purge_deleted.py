@@ -0,0 +1,74 @@
+import time
+
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core import models
+
+
+RECORD_MODELS = (models.MedicalHistory, models.Visit, models.Prescription,
+                 models.Allergy)
+
+
+class Command(BaseCommand):
+    """Django command to hard delete soft deleted rows in small batches"""
+
+    help = (
+        "Permanently removes records & users soft deleted before the "
+        "retention period, along with expired tombstones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help="Days soft deleted rows are retained")
+        parser.add_argument('--tombstone-days', type=int, default=90,
+                            help="Days tombstones are retained")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Rows deleted per transaction")
+        parser.add_argument('--sleep', type=float, default=0,
+                            help="Seconds to pause between batches")
+
+    def handle(self, *args, **options):
+        """Command logic"""
+        self.batch_size = options['batch_size']
+        self.pause = options['sleep']
+        now = timezone.now()
+        cutoff = now - timedelta(days=options['days'])
+
+        purged = 0
+        for model in RECORD_MODELS:
+            purged += self.purge(model.all_objects.filter(
+                deleted_at__lt=cutoff
+            ), models.SearchEntry.objects)
+        purged += self.purge(models.User.all_objects.filter(
+            deleted_at__lt=cutoff
+        ))
+        tombstones = self.purge(models.Tombstone.objects.filter(
+            deleted_at__lt=now - timedelta(days=options['tombstone_days'])
+        ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{purged} rows purged, {tombstones} tombstones expired'
+        ))
+
+    def purge(self, queryset, entries=None):
+        """Delete rows of queryset & their search entries batch by batch,
+        returning their count"""
+        manager = queryset.model._base_manager
+        purged = 0
+        while True:
+            ids = list(queryset.values_list('id', flat=True)[
+                :self.batch_size
+            ])
+            if not ids:
+                return purged
+            with transaction.atomic():
+                if entries is not None:
+                    entries.filter(object_id__in=ids).delete()
+                manager.filter(id__in=ids).delete()
+            purged += len(ids)
+            if self.pause:
+                time.sleep(self.pause)
@@ -0,0 +1,58 @@
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from analytics import rollups
+
+
+class Command(BaseCommand):
+    """Django command to recompute analytics rollups from source rows"""
+
+    help = (
+        "Recounts visits per day, prescriptions per medicine & new patients "
+        "per week, streaming source rows in chunks. Writes counted by a "
+        "rollup wait while it is rebuilt"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help="Rows read & written per round trip")
+
+    def handle(self, *args, **options):
+        """Command logic"""
+        chunk_size = options['chunk_size']
+        for model, rollup in rollups.ROLLUPS.items():
+            queryset = model.objects.all()
+            if model is rollups.User:
+                queryset = queryset.filter(group='patient')
+
+            # Writers wait on the rollup until it is replaced, so each row
+            # is either counted here or incremented afterwards
+            with transaction.atomic():
+                self.lock(rollup.model)
+                rollup.model.objects.all().delete()
+                counts = rollups.count(model, queryset.iterator(
+                    chunk_size=chunk_size
+                ))
+                counts.pop(None, None)
+                rollup.model.objects.bulk_create([
+                    rollup.model(**{rollup.field: key, 'count': value})
+                    for key, value in counts.items()
+                ], batch_size=chunk_size)
+
+            self.stdout.write(
+                f'{rollup.model.__name__}: {len(counts)} rows from '
+                f'{sum(counts.values())} {model.__name__} rows'
+            )
+        self.stdout.write(self.style.SUCCESS('Rollups rebuilt!'))
+
+    @staticmethod
+    def lock(model):
+        """Block writes to the table of model until the transaction ends.
+        SQLite takes its database lock on the first delete already."""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'LOCK TABLE '
+                    f'{connection.ops.quote_name(model._meta.db_table)} '
+                    f'IN EXCLUSIVE MODE'
+                )
@@ -0,0 +1,309 @@
+import io
+import random
+import time
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, models as db_models, transaction
+from django.utils import timezone
+
+from core import models
+from core.signals import post_bulk_create
+from record import search
+
+
+ROLE_MODELS = {
+    'patient': models.Patient,
+    'nurse': models.Nurse,
+    'doctor': models.Doctor,
+    'admin': models.Admin,
+}
+
+RECORD_MODELS = {
+    'visits': models.Visit,
+    'prescriptions': models.Prescription,
+    'allergies': models.Allergy,
+    'medical_histories': models.MedicalHistory,
+}
+
+TIMESTAMPED_MODELS = (models.User, ) + tuple(RECORD_MODELS.values())
+
+FIRST_NAMES = ('Ahmed', 'Ali', 'Ayesha', 'Bilal', 'Fatima', 'Hamza', 'Hina',
+               'Imran', 'Maryam', 'Omar', 'Sana', 'Usman', 'Zainab', 'Zara')
+LAST_NAMES = ('Ahmed', 'Butt', 'Chaudhry', 'Hussain', 'Iqbal', 'Khan',
+              'Malik', 'Mirza', 'Qureshi', 'Raza', 'Shah', 'Siddiqui')
+CITIES = ('Lahore', 'Karachi', 'Islamabad', 'Peshawar', 'Quetta', 'Multan')
+SPECIALITIES = ('Cardiology', 'Dermatology', 'General Medicine',
+                'Neurology', 'Orthopedics', 'Pediatrics')
+PURPOSES = ('Routine checkup', 'Fever and cough', 'Follow up',
+            'Blood pressure review', 'Vaccination', 'Back pain',
+            'Diabetes review', 'Skin rash')
+MEDICINES = ('Amoxicillin', 'Paracetamol', 'Ibuprofen', 'Metformin',
+             'Amlodipine', 'Omeprazole', 'Cetirizine', 'Azithromycin',
+             'Atorvastatin', 'Salbutamol')
+DOSES = ('250 mg', '500 mg', '5 ml', '10 mg', '1 tablet')
+FREQUENCIES = ('Once daily', 'Twice daily', 'Thrice daily', 'As needed')
+ALLERGIES = ('Penicillin', 'Peanuts', 'Dust', 'Pollen', 'Latex',
+             'Shellfish', 'Sulfa drugs')
+REACTIONS = ('Rash', 'Hives', 'Swelling', 'Sneezing', 'Breathlessness')
+HISTORY_TYPES = ('Surgery', 'Illness', 'Injury', 'Chronic condition')
+HISTORY_DESCRIPTIONS = ('Appendectomy', 'Typhoid', 'Fractured wrist',
+                        'Hypertension', 'Asthma', 'Dengue fever')
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let seeded rows keep their generated created_at & updated_at"""
+    fields = [
+        field for model in TIMESTAMPED_MODELS
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or
+        getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    """Django command to generate large deterministic datasets"""
+
+    help = (
+        "Creates users of every group with their roles & records of every "
+        "type in large batches, using COPY on PostgreSQL"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=1000)
+        parser.add_argument('--nurses', type=int, default=20)
+        parser.add_argument('--doctors', type=int, default=20)
+        parser.add_argument('--admins', type=int, default=2)
+        for name in RECORD_MODELS:
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int,
+                                default=10000, help=f"Number of {name}")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Seed making generated rows reproducible")
+        parser.add_argument('--start', default='2025-01-01',
+                            help="First day of generated timestamps")
+        parser.add_argument('--days', type=int, default=365,
+                            help="Days generated timestamps span")
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help="Rows written per transaction")
+        parser.add_argument('--password', default='password',
+                            help="Password of every generated user")
+        parser.add_argument('--no-copy', action='store_true',
+                            help="Use bulk_create even on PostgreSQL")
+
+    def handle(self, *args, **options):
+        """Command logic"""
+        try:
+            start = timezone.make_aware(
+                datetime.strptime(options['start'], '%Y-%m-%d')
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size must be positive')
+        if not options['patients'] or not (
+            options['doctors'] + options['nurses'] or options['admins']
+        ):
+            raise CommandError('Records need patients & staff')
+
+        self.rng = random.Random(options['seed'])
+        self.seed = options['seed']
+        self.start = start
+        self.span = timedelta(days=options['days']).total_seconds()
+        self.batch_size = options['batch_size']
+        self.use_copy = connection.vendor == 'postgresql' and \
+            not options['no_copy']
+        self.password = make_password(options['password'],
+                                      salt=f'seed{self.seed}')
+
+        groups = ('admin', 'nurse', 'doctor', 'patient')
+        self.check_cnics({group: options[f'{group}s'] for group in groups})
+
+        self.roles = {group: [] for group in ROLE_MODELS}
+        began = time.perf_counter()
+        with explicit_timestamps():
+            users = {
+                group: self.seed_users(group, options[f'{group}s'])
+                for group in groups
+            }
+            staff = users['doctor'] + users['nurse'] or users['admin']
+            for name, model in RECORD_MODELS.items():
+                self.seed_records(name, model, options[name],
+                                  users['patient'], staff)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded in {time.perf_counter() - began:.1f}s'
+        ))
+
+    def cnic(self, group, index):
+        """Return cnic of index-th user of group generated with the seed"""
+        return (f'{self.seed % 100000:05d}-{index:07d}-'
+                f'{list(ROLE_MODELS).index(group)}')
+
+    def check_cnics(self, totals):
+        """Refuse to seed users whose cnics are taken, e.g. by a previous
+        run with the same seed, before writing anything"""
+        for group, total in totals.items():
+            for offset in range(0, total, self.batch_size):
+                taken = models.User.all_objects.filter(cnic__in=[
+                    self.cnic(group, index) for index in
+                    range(offset, min(offset + self.batch_size, total))
+                ]).values_list('cnic', flat=True).first()
+                if taken is not None:
+                    raise CommandError(
+                        f'User {taken} already exists, seed {self.seed} '
+                        f'was used before, pass another --seed'
+                    )
+
+    def uuid(self):
+        """Return reproducible random uuid"""
+        return UUID(int=self.rng.getrandbits(128), version=4)
+
+    def timestamp(self, after=None):
+        """Return reproducible random timestamp within the span"""
+        start = after or self.start
+        end = self.start + timedelta(seconds=self.span)
+        return start + (end - start) * self.rng.random()
+
+    def seed_users(self, group, total):
+        """Create users of group with their roles, returning
+        (id, created_at) of each"""
+        users = []
+        for offset in range(0, total, self.batch_size):
+            roles, instances = [], []
+            for index in range(offset, min(offset + self.batch_size, total)):
+                role = self.make_role(group)
+                created_at = self.timestamp()
+                roles.append(role)
+                instances.append(models.User(
+                    id=self.uuid(), password=self.password, group=group,
+                    cnic=self.cnic(group, index),
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    city=self.rng.choice(CITIES), country='Pakistan',
+                    gender=self.rng.choice(('male', 'female')),
+                    is_staff=group == 'admin', created_at=created_at,
+                    updated_at=created_at, **{group: role}
+                ))
+            with transaction.atomic():
+                self.write(ROLE_MODELS[group], roles)
+                self.write(models.User, instances)
+            self.roles[group] += [role.id for role in roles]
+            users += [(user.id, user.created_at) for user in instances]
+            self.stdout.write(f'{len(users)}/{total} {group}s')
+        return users
+
+    def make_role(self, group):
+        """Return unsaved role row of group"""
+        if group == 'patient':
+            return models.Patient(
+                id=self.uuid(), weight=round(self.rng.uniform(40, 110), 1),
+                height=round(self.rng.uniform(140, 195), 1),
+                date_of_birth=self.start - timedelta(
+                    days=self.rng.randrange(365, 365 * 90)
+                )
+            )
+        if group == 'doctor':
+            return models.Doctor(
+                id=self.uuid(), speciality=self.rng.choice(SPECIALITIES),
+                nurse_assigned_id=self.rng.choice(self.roles['nurse'])
+                if self.roles['nurse'] else None
+            )
+        return ROLE_MODELS[group](id=self.uuid())
+
+    def seed_records(self, name, model, total, patients, staff):
+        """Create records of model spread across patients & staff"""
+        for offset in range(0, total, self.batch_size):
+            instances = []
+            for index in range(offset, min(offset + self.batch_size, total)):
+                patient_id, joined_at = self.rng.choice(patients)
+                author_id = self.rng.choice(staff)[0]
+                created_at = self.timestamp(after=joined_at)
+                instances.append(model(
+                    id=self.uuid(), patient_id=patient_id,
+                    created_by_id=author_id, updated_by_id=author_id,
+                    created_at=created_at, updated_at=created_at,
+                    **self.make_record_fields(model, created_at)
+                ))
+            with transaction.atomic():
+                self.write(model, instances)
+                self.write(models.SearchEntry, [
+                    search.get_entry(instance) for instance in instances
+                ])
+            self.stdout.write(f'{offset + len(instances)}/{total} {name}')
+
+    def make_record_fields(self, model, created_at):
+        """Return realistic field values of record model"""
+        if model is models.Visit:
+            return {'visited_at': created_at,
+                    'purpose': self.rng.choice(PURPOSES)}
+        if model is models.Prescription:
+            return {'medicine': self.rng.choice(MEDICINES),
+                    'dose': self.rng.choice(DOSES),
+                    'frequency': self.rng.choice(FREQUENCIES)}
+        if model is models.Allergy:
+            return {'name': self.rng.choice(ALLERGIES),
+                    'description': self.rng.choice(REACTIONS)}
+        return {'type': self.rng.choice(HISTORY_TYPES),
+                'description': self.rng.choice(HISTORY_DESCRIPTIONS),
+                'happened_at': created_at - timedelta(
+                    days=self.rng.randrange(30, 3650)
+                )}
+
+    def write(self, model, instances):
+        """Insert instances with COPY or bulk_create, updating rollups"""
+        if self.use_copy:
+            self.copy(model, instances)
+        else:
+            model.objects.bulk_create(instances)
+        post_bulk_create.send(sender=model, instances=instances)
+
+    @staticmethod
+    def copy(model, instances):
+        """Stream instances into the table of model with COPY"""
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not isinstance(field, db_models.AutoField)
+        ]
+        buffer = io.StringIO()
+        for instance in instances:
+            buffer.write('\t'.join(
+                Command.copy_value(field.get_db_prep_save(
+                    getattr(instance, field.attname), connection
+                )) for field in fields
+            ) + '\n')
+        buffer.seek(0)
+
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(model._meta.db_table)} '
+                f'({columns}) FROM STDIN', buffer
+            )
+
+    @staticmethod
+    def copy_value(value):
+        """Return value in COPY text format"""
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value).replace('\\', '\\\\').replace(
+            '\t', '\\t'
+        ).replace('\n', '\\n').replace('\r', '\\r')
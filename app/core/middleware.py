@@ -0,0 +1,163 @@
+import time
+
+from contextlib import ExitStack, contextmanager
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from rest_framework.permissions import SAFE_METHODS
+
+from . import routers, stats
+
+
+pinned_requests = stats.counter('db_routing_pinned_total',
+                                'Safe requests pinned to primary')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class ReplicaRoutingMiddleware:
+    """Let safe requests read from replicas unless client wrote recently"""
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in SAFE_METHODS
+        pinned = safe and self.is_pinned(request)
+        if pinned:
+            pinned_requests.increment()
+
+        routers.set_read_from_replica(safe and not pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.set_read_from_replica(False)
+
+        if not safe and response.status_code < 400:
+            self.pin(request.META.get('HTTP_AUTHORIZATION', ''))
+            # Logins carry no credentials yet, pin the token they issued
+            self.pin(getattr(response, 'issued_credentials', ''))
+        return response
+
+    @staticmethod
+    def get_pin_key(credentials):
+        """Return cache key identifying the client, if any"""
+        if not credentials:
+            return None
+        digest = sha256(credentials.encode()).hexdigest()
+        return f'replica-pin:{digest}'
+
+    def is_pinned(self, request):
+        """Return whether client wrote within the pin window"""
+        key = self.get_pin_key(request.META.get('HTTP_AUTHORIZATION', ''))
+        if key is None:
+            return False
+        return caches[settings.REPLICA_PIN_CACHE_ALIAS].get(key, False)
+
+    def pin(self, credentials):
+        """Read client's writes back from primary for a while"""
+        key = self.get_pin_key(credentials)
+        if key is not None:
+            caches[settings.REPLICA_PIN_CACHE_ALIAS].set(
+                key, True, settings.REPLICA_PIN_SECONDS
+            )
+
+
+class QueryRecorder:
+    """Execute wrapper counting & timing queries of a request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Record latency, queries & response size of every route"""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+
+        if response.streaming:
+            # Streamed content is produced, & queried, after returning
+            response.streaming_content = self.stream(
+                request, response, response.streaming_content, recorder,
+                start
+            )
+        else:
+            self.observe(request, response, recorder,
+                         time.perf_counter() - start, len(response.content))
+        return response
+
+    @staticmethod
+    @contextmanager
+    def recording(recorder):
+        """Record queries run on every connection"""
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(recorder)
+                )
+            yield
+
+    def stream(self, request, response, content, recorder, start):
+        """Yield streamed content, observing the request once sent"""
+        size = 0
+        try:
+            with self.recording(recorder):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self.observe(request, response, recorder,
+                         time.perf_counter() - start, size)
+
+    def observe(self, request, response, recorder, duration, size):
+        """Record metrics of a served request"""
+        route = self.get_route(request)
+        stats.counter('http_requests_total', 'Requests served',
+                      route=route, method=request.method,
+                      status=response.status_code).increment()
+        stats.histogram('http_request_duration_seconds',
+                        'Request latency', LATENCY_BUCKETS,
+                        route=route, method=request.method).observe(duration)
+        stats.histogram('http_request_db_queries',
+                        'Database queries per request', QUERY_BUCKETS,
+                        route=route).observe(recorder.count)
+        stats.histogram('http_request_db_duration_seconds',
+                        'Database time per request', LATENCY_BUCKETS,
+                        route=route).observe(recorder.duration)
+        stats.histogram('http_response_size_bytes',
+                        'Response body size', SIZE_BUCKETS,
+                        route=route).observe(size)
+
+    @staticmethod
+    def get_route(request):
+        """Return namespaced url name of request, bounding cardinality"""
+        match = getattr(request, 'resolver_match', None)
+        if match is None or not match.url_name:
+            return 'unmatched'
+        return match.view_name
@@ -0,0 +1,136 @@
+from hashlib import md5
+from uuid import UUID
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, \
+    patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField
+from rest_framework.response import Response
+
+from core import response_cache
+from core.models import Tombstone
+
+
+class ConditionalGetMixin:
+    """Answer conditional GET requests from updated_at of rows"""
+
+    conditional_fields = ('updated_at', )
+
+    def get_conditional_state(self, queryset):
+        """Return (last modified, count) of rows, changing with any of them"""
+        try:
+            state = queryset.order_by().aggregate(count=Count('pk'), **{
+                field: Max(field) for field in self.conditional_fields
+            })
+        except (TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        modified = [state[field] for field in self.conditional_fields
+                    if state[field] is not None]
+        return max(modified) if modified else None, state['count']
+
+    def get_conditional_response(self, request, state, get_response,
+                                 last_modified=True):
+        """Return 304 when rows are unchanged, else the full response.
+        Lists pass last_modified=False, rows leaving them never move it."""
+        modified, count = state
+        timestamp = None
+        if last_modified and modified is not None:
+            timestamp = int(modified.timestamp())
+
+        etag = quote_etag(md5(
+            f'{request.user.pk}:{request.get_full_path()}:'
+            f'{modified}:{count}'.encode()
+        ).hexdigest())
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = get_response()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        patch_vary_headers(response, ('Authorization', ))
+        return response
+
+
+class UpdatedSinceMixin:
+    """Restrict querysets to rows changed since ?updated_since="""
+
+    updated_since_query_param = 'updated_since'
+
+    def filter_updated_since(self, queryset, field='updated_at'):
+        """Keep rows whose field is at or after the requested timestamp"""
+        value = self.request.GET.get(self.updated_since_query_param, None)
+        if value is None or value == '':
+            return queryset
+        try:
+            updated_since = DateTimeField().to_internal_value(value)
+        except ValidationError as error:
+            raise ValidationError({
+                self.updated_since_query_param: error.detail
+            })
+        return queryset.filter(**{f'{field}__gte': updated_since})
+
+
+class SoftDeleteMixin:
+    """Mark instances deleted instead of removing rows, leaving tombstones"""
+
+    tombstone_type = None
+
+    def perform_destroy(self, instance):
+        """Soft delete instance & record its tombstone atomically"""
+        instance.deleted_at = timezone.now()
+        with transaction.atomic():
+            Tombstone.objects.create(
+                type=self.tombstone_type, object_id=instance.pk,
+                patient_id=self.get_tombstone_patient_id(instance)
+            )
+            instance.save(update_fields=self.get_soft_delete_fields(instance))
+            self.soft_delete_dependents(instance)
+
+    def get_soft_delete_fields(self, instance):
+        """Return fields written when soft deleting instance"""
+        return ['deleted_at', 'updated_at']
+
+    def soft_delete_dependents(self, instance):
+        """Soft delete rows hidden along with the saved instance"""
+
+    def get_tombstone_patient_id(self, instance):
+        """Return id of patient owning instance"""
+        return instance.patient_id
+
+
+class CachedResponseMixin:
+    """Serve patient scoped responses from cache while rows are unchanged"""
+
+    def get_cached_response(self, request, patient_id, state,
+                            get_response):
+        """Return cached response of patient in the conditional state of
+        its rows, else compute & cache it"""
+        try:
+            patient_id = UUID(str(patient_id))
+        except ValueError:
+            return get_response()
+
+        cache = response_cache.get_response_cache()
+        key = response_cache.get_response_key(request, patient_id, state)
+        data = cache.get(key)
+        if data is not None:
+            response_cache.hits.increment()
+            return Response(data)
+
+        response_cache.misses.increment()
+        response = get_response()
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
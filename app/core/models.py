@@ -67,8 +67,22 @@ class Admin(models.Model):
         app_label = 'user'
 
 
+class SoftDeleteManager(models.Manager):
+    """Manager hiding soft deleted rows"""
+
+    def get_queryset(self):
+        return super(SoftDeleteManager, self).get_queryset().filter(
+            deleted_at__isnull=True
+        )
+
+
 class UserManager(BaseUserManager):
-    """Manager for User model"""
+    """Manager for User model, hiding soft deleted users"""
+
+    def get_queryset(self):
+        return super(UserManager, self).get_queryset().filter(
+            deleted_at__isnull=True
+        )
 
     def create_user(self, cnic, password, **extra_fields):
         """Creates and saves a new user"""
@@ -82,11 +96,9 @@ class UserManager(BaseUserManager):
 
     def create_superuser(self, cnic, password, **extra_fields):
         """Creates and save a new superuser"""
-        user = self.create_user(cnic, password, **extra_fields)
-        user.is_staff = True
-        user.is_superuser = True
-        user.save()
-        return user
+        extra_fields['is_staff'] = True
+        extra_fields['is_superuser'] = True
+        return self.create_user(cnic, password, **extra_fields)
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -124,6 +136,7 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
     created_by = models.ForeignKey('User', on_delete=models.SET_NULL,
                                    null=True,
                                    related_name='created_users')
@@ -134,6 +147,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'cnic'
 
     objects = UserManager()
+    all_objects = models.Manager()
 
     @property
     def role(self):
@@ -145,6 +159,17 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         app_label = 'user'
         default_related_name = 'users'
+        indexes = [
+            models.Index(fields=['group', 'created_at', 'id'],
+                         name='user_group_created_idx'),
+            models.Index(fields=['created_at', 'id'],
+                         name='user_created_idx'),
+            models.Index(fields=['updated_at'],
+                         name='user_updated_idx'),
+            models.Index(fields=['deleted_at'],
+                         name='user_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
 
 
 class MedicalHistory(models.Model):
@@ -155,10 +180,12 @@ class MedicalHistory(models.Model):
     description = models.TextField(blank=True)
     happened_at = models.DateTimeField(null=True)
 
-    patient = models.ForeignKey(User, on_delete=models.CASCADE)
+    patient = models.ForeignKey(User, on_delete=models.CASCADE,
+                                db_index=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL,
                                    null=True,
                                    related_name='created_medical_histories')
@@ -166,11 +193,25 @@ class MedicalHistory(models.Model):
                                    null=True,
                                    related_name='updated_medical_histories')
 
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
     def __repr__(self):
         return f'{self.type} - {self.description}'
 
     class Meta:
         app_label = 'record'
+        indexes = [
+            models.Index(fields=['patient', 'created_at', 'id'],
+                         name='medhistory_patient_idx'),
+            models.Index(fields=['created_at', 'id'],
+                         name='medhistory_created_idx'),
+            models.Index(fields=['patient', 'updated_at'],
+                         name='medhistory_updated_idx'),
+            models.Index(fields=['deleted_at'],
+                         name='medhistory_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
 
 
 class Visit(models.Model):
@@ -180,20 +221,38 @@ class Visit(models.Model):
     purpose = models.TextField(blank=True)
     visited_at = models.DateTimeField()
 
-    patient = models.ForeignKey(User, on_delete=models.CASCADE)
+    patient = models.ForeignKey(User, on_delete=models.CASCADE,
+                                db_index=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL,
                                    null=True, related_name='created_visits')
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL,
                                    null=True, related_name='updated_visits')
 
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
     def __repr__(self):
         return self.visitedAt
 
     class Meta:
         app_label = 'record'
+        indexes = [
+            models.Index(fields=['patient', 'visited_at'],
+                         name='visit_patient_visited_idx'),
+            models.Index(fields=['patient', 'created_at', 'id'],
+                         name='visit_patient_idx'),
+            models.Index(fields=['created_at', 'id'],
+                         name='visit_created_idx'),
+            models.Index(fields=['patient', 'updated_at'],
+                         name='visit_updated_idx'),
+            models.Index(fields=['deleted_at'],
+                         name='visit_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
 
 
 class Prescription(models.Model):
@@ -205,10 +264,12 @@ class Prescription(models.Model):
     frequency = models.CharField(max_length=255, blank=True)
     notes = models.TextField(blank=True)
 
-    patient = models.ForeignKey(User, on_delete=models.CASCADE)
+    patient = models.ForeignKey(User, on_delete=models.CASCADE,
+                                db_index=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL,
                                    null=True,
                                    related_name='created_prescriptions')
@@ -216,11 +277,25 @@ class Prescription(models.Model):
                                    null=True,
                                    related_name='updated_prescriptions')
 
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
     def __repr__(self):
         return self.medicine
 
     class Meta:
         app_label = 'record'
+        indexes = [
+            models.Index(fields=['patient', 'created_at', 'id'],
+                         name='prescription_patient_idx'),
+            models.Index(fields=['created_at', 'id'],
+                         name='prescription_created_idx'),
+            models.Index(fields=['patient', 'updated_at'],
+                         name='prescription_updated_idx'),
+            models.Index(fields=['deleted_at'],
+                         name='prescription_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
 
 
 class Allergy(models.Model):
@@ -230,10 +305,12 @@ class Allergy(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
 
-    patient = models.ForeignKey(User, on_delete=models.CASCADE)
+    patient = models.ForeignKey(User, on_delete=models.CASCADE,
+                                db_index=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL,
                                    null=True,
                                    related_name='created_allergies')
@@ -241,8 +318,118 @@ class Allergy(models.Model):
                                    null=True,
                                    related_name='updated_allergies')
 
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
     def __repr__(self):
         return self.name
 
     class Meta:
         app_label = 'record'
+        indexes = [
+            models.Index(fields=['patient', 'created_at', 'id'],
+                         name='allergy_patient_idx'),
+            models.Index(fields=['created_at', 'id'],
+                         name='allergy_created_idx'),
+            models.Index(fields=['patient', 'updated_at'],
+                         name='allergy_updated_idx'),
+            models.Index(fields=['deleted_at'],
+                         name='allergy_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
+
+
+class Tombstone(models.Model):
+    """Marker of a row removed through the API, for incremental sync"""
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+
+    type = models.CharField(max_length=255)
+    object_id = models.UUIDField()
+    patient_id = models.UUIDField(null=True, blank=True)
+
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __repr__(self):
+        return f'{self.type} - {self.object_id}'
+
+    class Meta:
+        app_label = 'record'
+        indexes = [
+            models.Index(fields=['patient_id', 'deleted_at', 'id'],
+                         name='tombstone_patient_idx'),
+            models.Index(fields=['deleted_at', 'id'],
+                         name='tombstone_deleted_idx'),
+        ]
+
+
+class SearchEntry(models.Model):
+    """Searchable text of a record, indexed by the database for full-text
+    search. Integer keys let SQLite FTS5 use them as rowids."""
+    id = models.AutoField(primary_key=True)
+
+    type = models.CharField(max_length=255)
+    object_id = models.UUIDField()
+    document = models.TextField(blank=True)
+
+    patient = models.ForeignKey(User, on_delete=models.CASCADE,
+                                db_index=False,
+                                related_name='search_entries')
+
+    created_at = models.DateTimeField()
+
+    def __repr__(self):
+        return f'{self.type} - {self.object_id}'
+
+    class Meta:
+        app_label = 'record'
+        constraints = [
+            models.UniqueConstraint(fields=['type', 'object_id'],
+                                    name='searchentry_object_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['patient', 'created_at'],
+                         name='searchentry_patient_idx'),
+        ]
+
+
+class DailyVisitCount(models.Model):
+    """Rollup of visits per day"""
+    date = models.DateField(primary_key=True)
+
+    count = models.IntegerField(default=0)
+
+    def __repr__(self):
+        return f'{self.date} - {self.count}'
+
+    class Meta:
+        app_label = 'analytics'
+
+
+class MedicinePrescriptionCount(models.Model):
+    """Rollup of prescriptions per medicine"""
+    medicine = models.CharField(max_length=255, primary_key=True)
+
+    count = models.IntegerField(default=0)
+
+    def __repr__(self):
+        return f'{self.medicine} - {self.count}'
+
+    class Meta:
+        app_label = 'analytics'
+        indexes = [
+            models.Index(fields=['count'],
+                         name='medicine_count_idx'),
+        ]
+
+
+class WeeklyNewPatientCount(models.Model):
+    """Rollup of patients joining per week, keyed by its monday"""
+    week = models.DateField(primary_key=True)
+
+    count = models.IntegerField(default=0)
+
+    def __repr__(self):
+        return f'{self.week} - {self.count}'
+
+    class Meta:
+        app_label = 'analytics'
@@ -0,0 +1,187 @@
+import heapq
+
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from itertools import islice
+from urllib import parse
+from uuid import UUID
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class SizedPagination(BasePagination):
+    """Client sized pages wrapped alongside next & previous links"""
+
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 1000
+
+    def get_paginated_response(self, data):
+        """Wrap page data alongside next & previous links"""
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_page_size(self, request):
+        """Return page size requested by client, bounded by max"""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+
+class KeysetPagination(SizedPagination):
+    """Keyset pagination ordered on (ordering_field, id) with opaque cursors"""
+
+    ordering_field = 'created_at'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a single page of results after the requested cursor"""
+        return self.paginate_querysets([queryset], request, view)
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """Return a single page merged across several querysets"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request)
+
+        limit = self.page_size + 1
+        results = list(islice(heapq.merge(*[
+            self.filter_queryset(
+                queryset, self.position, self.reverse
+            )[:limit] for queryset in querysets
+        ], key=self.get_position, reverse=self.reverse), limit))
+        has_following = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+
+        if self.reverse:
+            self.has_next = self.position is not None
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.position is not None
+        return self.page
+
+    def filter_queryset(self, queryset, position, reverse):
+        """Order queryset & filter rows after position"""
+        field = self.ordering_field
+        if reverse:
+            queryset = queryset.order_by(f'-{field}', '-id')
+        else:
+            queryset = queryset.order_by(field, 'id')
+
+        if position is not None:
+            value, pk = position
+            lookup = 'lt' if reverse else 'gt'
+            # The redundant inclusive bound lets the database range scan
+            # the (field, id) index instead of filtering every row
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}e': value}),
+                Q(**{f'{field}__{lookup}': value}) |
+                Q(**{field: value, f'id__{lookup}': pk})
+            )
+        return queryset
+
+    def get_position(self, instance):
+        """Return keyset position of instance"""
+        return getattr(instance, self.ordering_field), instance.id
+
+    def get_next_link(self):
+        """Return link to next page"""
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        """Return link to previous page"""
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), True)
+
+    def decode_cursor(self, request):
+        """Return (position, reverse) from cursor query param"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            query = parse.parse_qs(
+                b64decode(encoded.encode('ascii')).decode('ascii'),
+                keep_blank_values=True
+            )
+            value = parse_datetime(query['c'][0])
+            pk = UUID(query['i'][0])
+            reverse = bool(int(query.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (value, pk), reverse
+
+    def encode_cursor(self, position, reverse):
+        """Return url carrying the opaque cursor for position"""
+        value, pk = position
+        tokens = OrderedDict([('c', value.isoformat()), ('i', str(pk))])
+        if reverse:
+            tokens['r'] = '1'
+        encoded = b64encode(
+            parse.urlencode(tokens, doseq=True).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+
+class OffsetPagination(SizedPagination):
+    """Offset pagination for ranked results, without counting rows"""
+
+    offset_query_param = 'offset'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a single page of results after the requested offset"""
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        try:
+            self.offset = max(
+                int(request.query_params[self.offset_query_param]), 0
+            )
+        except (KeyError, ValueError):
+            self.offset = 0
+
+        results = list(queryset[self.offset:self.offset + self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        return results[:self.page_size]
+
+    def get_next_link(self):
+        """Return link to next page"""
+        if not self.has_next:
+            return None
+        return replace_query_param(self.base_url, self.offset_query_param,
+                                   self.offset + self.page_size)
+
+    def get_previous_link(self):
+        """Return link to previous page"""
+        if self.offset <= 0:
+            return None
+        if self.offset <= self.page_size:
+            return remove_query_param(self.base_url, self.offset_query_param)
+        return replace_query_param(self.base_url, self.offset_query_param,
+                                   self.offset - self.page_size)
@@ -0,0 +1,32 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import stats
+
+
+hits = stats.counter('response_cache_hits_total',
+                     'List responses served from cache')
+misses = stats.counter('response_cache_misses_total',
+                       'List responses computed from database')
+
+
+def get_response_cache():
+    """Return cache configured for list responses"""
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_response_key(request, patient_id, state):
+    """Return cache key of response for requesting group & patient, in the
+    conditional state of its rows"""
+    path = md5(
+        f'{request.get_full_path()}:{state[0]}:{state[1]}'.encode()
+    ).hexdigest()
+    return f'response:{request.user.group}:{patient_id}:{path}'
+
+
+def hit_ratio():
+    """Return share of list responses served from cache"""
+    total = hits.value + misses.value
+    return hits.value / total if total else 0.0
@@ -0,0 +1,50 @@
+import random
+import threading
+
+from django.conf import settings
+
+from . import stats
+
+
+_state = threading.local()
+
+replica_reads = stats.counter('db_routing_total', 'Database routing decisions',
+                              target='replica')
+primary_reads = stats.counter('db_routing_total', 'Database routing decisions',
+                              target='primary')
+
+
+def set_read_from_replica(value):
+    """Allow or forbid replica reads in the current thread"""
+    _state.read_from_replica = value
+
+
+def read_from_replica():
+    """Return whether reads of the current thread may use a replica"""
+    return getattr(_state, 'read_from_replica', False)
+
+
+class ReplicaRouter:
+    """Send reads of safe requests to replicas, everything else to primary"""
+
+    def db_for_read(self, model, **hints):
+        """Pick a random replica when allowed"""
+        if not settings.DATABASE_REPLICAS:
+            return 'default'
+        if read_from_replica():
+            replica_reads.increment()
+            return random.choice(settings.DATABASE_REPLICAS)
+        primary_reads.increment()
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        """Always write to primary"""
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Replicas hold the same data as primary"""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Only migrate primary, replicas follow through replication"""
+        return db not in settings.DATABASE_REPLICAS
@@ -1,26 +1,60 @@
+from django.db import transaction
+
 from rest_framework import serializers
+from rest_framework.utils import model_meta
 
 
 class ModelBySerializer(serializers.ModelSerializer):
-    """Support for created_by & updated_by"""
+    """Support for created_by & updated_by, committing writes along with
+    their post_save receivers"""
 
     def create(self, validated_data):
         """Support for created_by & updated_by"""
         request = self.context['request']
 
-        user = super(ModelBySerializer, self).create(validated_data)
-        user.created_by = request.user
-        user.updated_by = request.user
-        user.save()
+        validated_data['created_by'] = request.user
+        validated_data['updated_by'] = request.user
 
-        return user
+        with transaction.atomic():
+            return super(ModelBySerializer, self).create(validated_data)
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Support for updated_by"""
+        """Support for updated_by, saving changed fields only"""
         request = self.context['request']
 
-        user = super(ModelBySerializer, self).update(instance, validated_data)
-        user.updated_by = request.user
-        user.save()
+        validated_data['updated_by'] = request.user
+
+        info = model_meta.get_field_info(instance)
+        update_fields = ['updated_at']
+        many_to_many = []
+        for attr, value in validated_data.items():
+            if attr in info.relations and info.relations[attr].to_many:
+                many_to_many.append((attr, value))
+            else:
+                setattr(instance, attr, value)
+                update_fields.append(attr)
+
+        instance.save(update_fields=update_fields)
+
+        for attr, value in many_to_many:
+            getattr(instance, attr).set(value)
+
+        return instance
+
+
+class IdentityMapMixin:
+    """Serialize each instance once per response, reusing its representation
+
+    Representations are memoized in the root serializer context, so every
+    serializer sharing that context reuses them.
+    """
 
-        return user
+    def to_representation(self, instance):
+        """Return memoized representation of instance"""
+        identity_map = self.context.setdefault('identity_map', {})
+        key = (type(self), instance.pk)
+        if key not in identity_map:
+            identity_map[key] = super(IdentityMapMixin,
+                                      self).to_representation(instance)
+        return identity_map[key]
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+
+# Sent after bulk_create, which skips post_save, with the created instances
+post_bulk_create = Signal(providing_args=['instances'])
@@ -0,0 +1,249 @@
+import fcntl
+import json
+import os
+import threading
+import time
+
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class Counter:
+    """Thread safe in-process counter"""
+
+    def __init__(self, name, description='', labels=()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def increment(self, amount=1):
+        """Increment counter by amount"""
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Thread safe in-process histogram with cumulative buckets"""
+
+    def __init__(self, name, description='', buckets=(), labels=()):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.labels = labels
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record value in the first bucket it fits"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+counters = OrderedDict()
+
+histograms = OrderedDict()
+
+_lock = threading.Lock()
+
+
+def counter(name, description='', **labels):
+    """Return registered counter, creating it on first use"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        if key not in counters:
+            counters[key] = Counter(name, description, key[1])
+        return counters[key]
+
+
+def histogram(name, description='', buckets=(), **labels):
+    """Return registered histogram, creating it on first use"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        if key not in histograms:
+            histograms[key] = Histogram(name, description, buckets, key[1])
+        return histograms[key]
+
+
+def format_labels(labels):
+    """Return labels in Prometheus exposition syntax"""
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    ) + '}'
+
+
+def snapshot():
+    """Return values of every registered metric in this process"""
+    histogram_values = []
+    for metric in list(histograms.values()):
+        with metric._lock:
+            histogram_values.append((
+                metric.name, metric.description, metric.buckets,
+                metric.labels, list(metric.counts), metric.sum, metric.count
+            ))
+    return {
+        'counters': [
+            (metric.name, metric.description, metric.labels, metric.value)
+            for metric in list(counters.values())
+        ],
+        'histograms': histogram_values,
+    }
+
+
+def merge(snapshots):
+    """Return snapshot summing values of metrics across snapshots"""
+    merged_counters = OrderedDict()
+    merged_histograms = OrderedDict()
+    for values in snapshots:
+        for name, description, labels, value in values['counters']:
+            labels = tuple(tuple(label) for label in labels)
+            key = (name, labels)
+            if key in merged_counters:
+                value += merged_counters[key][3]
+            merged_counters[key] = (name, description, labels, value)
+        for name, description, buckets, labels, counts, total, count in \
+                values['histograms']:
+            labels = tuple(tuple(label) for label in labels)
+            key = (name, labels)
+            if key in merged_histograms:
+                previous = merged_histograms[key]
+                counts = [a + b for a, b in zip(counts, previous[4])]
+                total += previous[5]
+                count += previous[6]
+            merged_histograms[key] = (name, description, tuple(buckets),
+                                      labels, counts, total, count)
+    return {'counters': list(merged_counters.values()),
+            'histograms': list(merged_histograms.values())}
+
+
+# Multiprocess servers export each process's snapshot to a shared directory,
+# merged when metrics are collected. Snapshots of exited processes are
+# folded into an archive so totals never go backwards.
+
+ARCHIVE = 'archive.json'
+
+
+def write(path, values):
+    """Atomically replace file at path with values"""
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(values, file)
+    os.replace(temporary, path)
+
+
+def read(path):
+    """Return snapshot stored at path, None when missing"""
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def locked(directory):
+    """Serialize collecting & archiving snapshots of directory"""
+    with open(os.path.join(directory, '.lock'), 'w') as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def dump(directory):
+    """Export snapshot of this process to directory"""
+    os.makedirs(directory, exist_ok=True)
+    write(os.path.join(directory, f'{os.getpid()}.json'), snapshot())
+
+
+_exporter_pid = None
+
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(directory, interval=1):
+    """Dump snapshot of this process every interval seconds"""
+    global _exporter_pid
+
+    def export():
+        while True:
+            time.sleep(interval)
+            dump(directory)
+
+    with _exporter_lock:
+        if _exporter_pid == os.getpid():
+            return
+        _exporter_pid = os.getpid()
+        threading.Thread(target=export, name='metrics-exporter',
+                         daemon=True).start()
+
+
+def archive(directory, pid):
+    """Fold snapshot of exited process into the archive"""
+    path = os.path.join(directory, f'{pid}.json')
+    with locked(directory):
+        values = read(path)
+        if values is None:
+            return
+        archive_path = os.path.join(directory, ARCHIVE)
+        write(archive_path, merge(filter(None, (read(archive_path),
+                                                values))))
+        os.remove(path)
+
+
+def collect(directory):
+    """Return snapshot merging every process exported to directory"""
+    os.makedirs(directory, exist_ok=True)
+    own = f'{os.getpid()}.json'
+    with locked(directory):
+        values = [
+            read(os.path.join(directory, name))
+            for name in os.listdir(directory)
+            if name.endswith('.json') and name != own
+        ]
+    return merge(filter(None, values + [snapshot()]))
+
+
+def render(values=None):
+    """Return metrics of snapshot, this process by default, in Prometheus
+    text format"""
+    if values is None:
+        values = snapshot()
+    lines = []
+    described = set()
+
+    def describe(name, description, kind):
+        if name not in described:
+            described.add(name)
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+
+    for name, description, labels, value in sorted(
+            values['counters'], key=lambda metric: metric[0]):
+        describe(name, description, 'counter')
+        lines.append(f'{name}{format_labels(labels)} {value}')
+
+    for name, description, buckets, labels, counts, total, count in sorted(
+            values['histograms'], key=lambda metric: metric[0]):
+        describe(name, description, 'histogram')
+        cumulative = 0
+        for bound, bucket_count in zip(tuple(buckets) + ('+Inf', ), counts):
+            cumulative += bucket_count
+            bucket_labels = format_labels(tuple(labels) + (('le', bound), ))
+            lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+        lines.append(f'{name}_sum{format_labels(labels)} {total}')
+        lines.append(f'{name}_count{format_labels(labels)} {count}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from app.asgi import ThreadPoolWsgiToAsgi
+
+
+class AsgiTests(SimpleTestCase):
+    """Tests for the ASGI entry point"""
+
+    def request(self, app):
+        """Return messages sent by app for a GET request"""
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        async def call():
+            await app({
+                'type': 'http', 'method': 'GET', 'path': '/',
+                'query_string': b'', 'http_version': '1.1',
+                'headers': [], 'server': ('testserver', 80),
+            }, receive, send)
+            return messages
+        return call()
+
+    def test_requests_run_concurrently(self):
+        """Test that blocking requests are served in parallel threads"""
+        barrier = threading.Barrier(4, timeout=5)
+
+        def wsgi_app(environ, start_response):
+            barrier.wait()
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [b'ok']
+
+        async def main():
+            app = ThreadPoolWsgiToAsgi(wsgi_app)
+            return await asyncio.gather(*[
+                self.request(app) for _ in range(4)
+            ])
+
+        for messages in asyncio.run(main()):
+            self.assertEqual(messages[0]['status'], 200)
+            self.assertEqual(messages[1]['body'], b'ok')
@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import authentication
+from core import utils
+
+
+USER_VIEW = reverse('user:user-view')
+VISIT_VIEW = reverse('record:visit-view')
+
+
+def user_detail(pk):
+    """Creates USER_DETAIL"""
+    return reverse('user:user-detail', args=[pk, ])
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Tests for cached token authentication"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.admin = utils.sample_user(group='admin')
+        self.token = Token.objects.create(user=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_cached(self):
+        """Test that token lookup is served from cache once warm"""
+        hits = authentication.hits.value
+        misses = authentication.misses.value
+
+        self.client.get(VISIT_VIEW)
+        with self.assertNumQueries(1):
+            res = self.client.get(VISIT_VIEW)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(authentication.hits.value, hits + 1)
+        self.assertEqual(authentication.misses.value, misses + 1)
+
+    def test_invalid_token_rejected(self):
+        """Test that unknown tokens are still rejected"""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        res = self.client.get(USER_VIEW)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_invalidates_token(self):
+        """Test that deactivating a user evicts cached credentials"""
+        patient = utils.sample_user(cnic='sample_patient', group='patient')
+        token = Token.objects.create(user=patient)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(client.get(USER_VIEW).status_code,
+                         status.HTTP_200_OK)
+
+        patient.is_active = False
+        patient.save()
+        self.assertEqual(client.get(USER_VIEW).status_code,
+                         status.HTTP_200_OK)
+
+        res = self.client.patch(user_detail(patient.id),
+                                {'first_name': 'test'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(client.get(USER_VIEW).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+    def test_destroy_invalidates_token(self):
+        """Test that destroyed users can no longer authenticate"""
+        self.client.get(USER_VIEW)
+        res = self.client.delete(user_detail(self.admin.id))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get(USER_VIEW).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
@@ -1,14 +1,24 @@
+import csv
 import os
 import shutil
+import tempfile
+
+from datetime import timedelta
+from io import StringIO
 
 from django.test import TestCase
 
-from django.core.management import call_command
+from django.contrib.auth import authenticate
+from django.core.management import call_command, CommandError
 from django.db.utils import OperationalError
+from django.utils import timezone
 
 from unittest import skip
 from unittest.mock import patch
 
+from core import models
+from core import utils
+
 
 class CommandTests(TestCase):
 
@@ -52,3 +62,196 @@ class CommandTests(TestCase):
         )))
 
         shutil.rmtree(top_dir)
+
+    def test_provision_users(self):
+        """Test provisioning users with roles from csv"""
+        utils.sample_user(cnic='existing', group='admin')
+        utils.sample_user(cnic='deleted', group='admin',
+                          deleted_at=timezone.now())
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='',
+                                         delete=False) as file:
+            writer = csv.writer(file)
+            writer.writerow(['cnic', 'password', 'group', 'first_name'])
+            writer.writerow(['patient_1', 'testpass', 'patient', 'Patient'])
+            writer.writerow(['patient_2', 'testpass', 'patient', ''])
+            writer.writerow(['patient_2', 'testpass', 'patient', ''])
+            writer.writerow(['doctor_1', 'testpass', 'doctor', ''])
+            writer.writerow(['existing', 'testpass', 'admin', ''])
+            writer.writerow(['deleted', 'testpass', 'admin', ''])
+        self.addCleanup(os.remove, file.name)
+
+        call_command('provision_users', file.name, batch_size=2, workers=1,
+                     stdout=StringIO())
+
+        self.assertEqual(models.User.objects.count(), 4)
+        patient = models.User.objects.get(cnic='patient_1')
+        self.assertEqual(patient.first_name, 'Patient')
+        self.assertIsNotNone(patient.patient)
+        self.assertIsNotNone(models.User.objects.get(cnic='doctor_1').doctor)
+        self.assertEqual(authenticate(cnic='patient_1', password='testpass'),
+                         patient)
+
+    def write_csv(self, *rows):
+        """Return path of temporary csv file holding rows"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='',
+                                         delete=False) as file:
+            csv.writer(file).writerows(rows)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test_provision_users_process_pool(self):
+        """Test hashing passwords in a pool of processes"""
+        path = self.write_csv(
+            ['cnic', 'password', 'group'],
+            *[[f'patient_{index}', f'testpass{index}', 'patient']
+              for index in range(6)]
+        )
+
+        call_command('provision_users', path, batch_size=4, workers=2,
+                     stdout=StringIO())
+
+        self.assertEqual(models.User.objects.count(), 6)
+        for index in range(6):
+            self.assertIsNotNone(authenticate(cnic=f'patient_{index}',
+                                              password=f'testpass{index}'))
+
+    def test_provision_users_invalid_rows(self):
+        """Test that incomplete csv files are rejected before writing"""
+        for rows, message in (
+            ([['cnic', 'group'], ['patient_1', 'patient']],
+             'Missing columns: password'),
+            ([['cnic', 'password', 'group'],
+              ['patient_1', 'testpass', 'patient'],
+              ['', 'testpass', 'patient']], 'Line 3: cnic is required'),
+            ([['cnic', 'password', 'group'], ['patient_1', 'testpass']],
+             'Line 2: group is required'),
+            ([['cnic', 'password', 'group'],
+              ['patient_1', 'testpass', 'pilot']],
+             "Line 2: invalid group 'pilot'"),
+        ):
+            with self.assertRaisesMessage(CommandError, message):
+                call_command('provision_users', self.write_csv(*rows),
+                             workers=1, stdout=StringIO())
+        self.assertFalse(models.User.objects.exists())
+
+    def test_purge_deleted(self):
+        """Test purging rows soft deleted before retention period"""
+        expired = timezone.now() - timedelta(days=31)
+        patient = utils.sample_user(cnic='patient', group='patient')
+        kept = utils.sample_user(cnic='kept', group='patient')
+        visit = utils.sample_visit(patient=kept)
+        deleted_visit = utils.sample_visit(patient=kept, deleted_at=expired)
+        recent_visit = utils.sample_visit(patient=kept,
+                                          deleted_at=timezone.now())
+        patient_visit = utils.sample_visit(patient=patient)
+        models.User.objects.filter(id=patient.id).update(deleted_at=expired)
+        models.Tombstone.objects.create(type='visit', object_id=visit.id)
+        models.Tombstone.objects.update(
+            deleted_at=timezone.now() - timedelta(days=91)
+        )
+
+        call_command('purge_deleted', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(set(models.Visit.all_objects.values_list(
+            'id', flat=True
+        )), {visit.id, recent_visit.id})
+        self.assertFalse(models.Visit.all_objects.filter(
+            id__in=[deleted_visit.id, patient_visit.id]
+        ).exists())
+        self.assertFalse(models.User.all_objects.filter(
+            id=patient.id
+        ).exists())
+        self.assertFalse(models.Tombstone.objects.exists())
+
+    def test_rebuild_rollups(self):
+        """Test recounting rollups from live rows"""
+        patient = utils.sample_user(cnic='patient', group='patient')
+        utils.sample_visit(patient=patient)
+        utils.sample_visit(patient=patient, deleted_at=timezone.now())
+        utils.sample_prescription(patient=patient, medicine='Ibuprofen')
+        models.DailyVisitCount.objects.update(count=10)
+        models.MedicinePrescriptionCount.objects.create(medicine='Stale',
+                                                        count=3)
+        models.WeeklyNewPatientCount.objects.all().delete()
+
+        call_command('rebuild_rollups', chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(list(models.DailyVisitCount.objects.values_list(
+            'count', flat=True
+        )), [1])
+        self.assertEqual(list(
+            models.MedicinePrescriptionCount.objects.values_list(
+                'medicine', 'count'
+            )
+        ), [('Ibuprofen', 1)])
+        self.assertEqual(list(
+            models.WeeklyNewPatientCount.objects.values_list(
+                'count', flat=True
+            )
+        ), [1])
+
+    def test_seed_data(self):
+        """Test generating users of every group & their records"""
+        options = {'patients': 5, 'nurses': 2, 'doctors': 2, 'admins': 1,
+                   'visits': 7, 'prescriptions': 6, 'allergies': 4,
+                   'medical_histories': 3, 'batch_size': 4, 'seed': 1}
+        call_command('seed_data', stdout=StringIO(), **options)
+
+        for group, count in (('patient', 5), ('nurse', 2), ('doctor', 2),
+                             ('admin', 1)):
+            self.assertEqual(models.User.objects.filter(
+                group=group, **{f'{group}__isnull': False}
+            ).count(), count)
+        for model, count in ((models.Visit, 7), (models.Prescription, 6),
+                             (models.Allergy, 4),
+                             (models.MedicalHistory, 3)):
+            self.assertEqual(model.objects.filter(
+                patient__group='patient', created_by__isnull=False
+            ).count(), count)
+        self.assertEqual(models.SearchEntry.objects.count(), 20)
+        self.assertEqual(sum(models.DailyVisitCount.objects.values_list(
+            'count', flat=True
+        )), 7)
+        self.assertEqual(sum(
+            models.WeeklyNewPatientCount.objects.values_list(
+                'count', flat=True
+            )
+        ), 5)
+        self.assertTrue(models.Visit.objects.filter(
+            created_at__lt=timezone.now() - timedelta(days=1)
+        ).exists())
+        patient = models.User.objects.filter(group='patient').first()
+        self.assertTrue(patient.check_password('password'))
+
+        visits = list(models.Visit.objects.order_by('id').values_list(
+            'id', 'patient_id', 'purpose', 'created_at'
+        ))
+        for model in (models.Patient, models.Nurse, models.Doctor,
+                      models.Admin):
+            model.objects.all().delete()
+        call_command('seed_data', stdout=StringIO(), **options)
+
+        self.assertEqual(list(models.Visit.objects.order_by('id').values_list(
+            'id', 'patient_id', 'purpose', 'created_at'
+        )), visits)
+
+    def test_seed_data_reused_seed(self):
+        """Test that seeding twice with one seed fails before writing"""
+        options = {'patients': 3, 'nurses': 1, 'doctors': 1, 'admins': 1,
+                   'visits': 2, 'prescriptions': 0, 'allergies': 0,
+                   'medical_histories': 0, 'seed': 2}
+        call_command('seed_data', stdout=StringIO(), **options)
+        users = models.User.all_objects.count()
+
+        with self.assertRaisesMessage(CommandError, 'seed 2 was used'):
+            call_command('seed_data', stdout=StringIO(),
+                         **dict(options, patients=5))
+        self.assertEqual(models.User.all_objects.count(), users)
+        self.assertEqual(models.Visit.objects.count(), 2)
+
+    def test_seed_data_without_staff(self):
+        """Test that records without staff to author them fail up front"""
+        with self.assertRaisesMessage(CommandError, 'patients & staff'):
+            call_command('seed_data', patients=2, nurses=0, doctors=0,
+                         admins=0, stdout=StringIO())
+        self.assertFalse(models.User.all_objects.exists())
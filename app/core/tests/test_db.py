@@ -0,0 +1,62 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+
+from core.db import close_unhealthy_connections
+
+
+class HealthCheckTests(TestCase):
+    """Tests for persistent connection health checks"""
+
+    def setUp(self) -> None:
+        connection.ensure_connection()
+        patcher = patch.dict(connection.settings_dict,
+                             {'CONN_HEALTH_CHECKS': True})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        connection.health_checked_at = None
+
+    def test_unhealthy_connection_closed(self):
+        """Test that unusable connections are closed"""
+        with patch.object(connection, 'is_usable', return_value=False), \
+                patch.object(connection, 'close') as close:
+            close_unhealthy_connections()
+        close.assert_called_once_with()
+
+    def test_healthy_connection_kept(self):
+        """Test that usable connections are kept open"""
+        with patch.object(connection, 'is_usable', return_value=True), \
+                patch.object(connection, 'close') as close:
+            close_unhealthy_connections()
+        close.assert_not_called()
+
+    def test_health_checks_disabled(self):
+        """Test that connections are not pinged when disabled"""
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = False
+        with patch.object(connection, 'is_usable') as is_usable:
+            close_unhealthy_connections()
+        is_usable.assert_not_called()
+
+    def test_health_checked_once_per_interval(self):
+        """Test that healthy connections are pinged once per interval"""
+        with patch.object(connection, 'is_usable',
+                          return_value=True) as is_usable, \
+                patch('time.monotonic', side_effect=[100, 110, 131]):
+            close_unhealthy_connections()
+            close_unhealthy_connections()
+            self.assertEqual(is_usable.call_count, 1)
+            close_unhealthy_connections()
+            self.assertEqual(is_usable.call_count, 2)
+
+    def test_health_checked_after_errors(self):
+        """Test that connections are pinged again after errors"""
+        with patch.object(connection, 'is_usable',
+                          return_value=True) as is_usable, \
+                patch.object(connection, 'errors_occurred', False):
+            close_unhealthy_connections()
+            close_unhealthy_connections()
+            self.assertEqual(is_usable.call_count, 1)
+            connection.errors_occurred = True
+            close_unhealthy_connections()
+            self.assertEqual(is_usable.call_count, 2)
@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+
+from unittest.mock import patch
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import stats
+from core import utils
+from core.middleware import MetricsMiddleware
+
+
+METRICS = reverse('metrics')
+
+
+class StatsTests(TestCase):
+    """Tests for metric registry rendering"""
+
+    def test_histogram_render(self):
+        """Test that histograms render cumulative buckets"""
+        histogram = stats.histogram('test_render_seconds', 'Test',
+                                    (0.1, 1), route='test')
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        text = stats.render()
+        self.assertIn('# TYPE test_render_seconds histogram', text)
+        self.assertIn('test_render_seconds_bucket{route="test",le="0.1"} 1',
+                      text)
+        self.assertIn('test_render_seconds_bucket{route="test",le="1"} 2',
+                      text)
+        self.assertIn(
+            'test_render_seconds_bucket{route="test",le="+Inf"} 3', text
+        )
+        self.assertIn('test_render_seconds_count{route="test"} 3', text)
+
+    def test_collect_merges_processes(self):
+        """Test that snapshots of every process are summed"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        counter = stats.counter('test_collect_total', 'Test')
+        histogram = stats.histogram('test_collect_seconds', 'Test', (1, ))
+        counter.increment()
+        histogram.observe(0.5)
+        with patch('os.getpid', return_value=1):
+            stats.dump(directory)
+        with patch('os.getpid', return_value=2):
+            stats.dump(directory)
+        stats.archive(directory, 2)
+        self.assertEqual(sorted(os.listdir(directory)),
+                         ['.lock', '1.json', 'archive.json'])
+
+        text = stats.render(stats.collect(directory))
+        self.assertIn('test_collect_total 3', text)
+        self.assertIn('test_collect_seconds_bucket{le="1"} 3', text)
+        self.assertIn('test_collect_seconds_sum 1.5', text)
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsMiddlewareTests(TestCase):
+    """Tests for per route request metrics"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.force_authenticate(
+            user=utils.sample_user(group='doctor')
+        )
+
+    def test_route_metrics(self):
+        """Test that latency & queries are recorded per route name"""
+        self.client.get(reverse('record:visit-view'))
+        queries = stats.histogram('http_request_db_queries',
+                                  route='record:visit-view')
+        self.assertGreater(queries.count, 0)
+        self.assertGreater(queries.sum, 0)
+
+        res = self.client.get(METRICS)
+        self.assertEqual(res.status_code, 200)
+        text = res.content.decode()
+        self.assertIn('http_request_duration_seconds_count'
+                      '{method="GET",route="record:visit-view"}', text)
+        self.assertIn('http_response_size_bytes_count'
+                      '{route="record:visit-view"}', text)
+
+    def test_streaming_route_metrics(self):
+        """Test that queries of streamed responses are recorded"""
+        utils.sample_visit(patient=utils.sample_user(cnic='sample_patient',
+                                                     group='patient'))
+        queries = stats.histogram('http_request_db_queries',
+                                  route='record:visit-export')
+        count, total = queries.count, queries.sum
+        res = self.client.get(reverse('record:visit-export'))
+        self.assertEqual(queries.count, count)
+        content = b''.join(res.streaming_content)
+
+        self.assertEqual(queries.count, count + 1)
+        self.assertGreater(queries.sum, total)
+        size = stats.histogram('http_response_size_bytes',
+                               route='record:visit-export')
+        self.assertGreaterEqual(size.sum, len(content))
+
+
+class MetricsDisabledTests(TestCase):
+    """Tests for disabled metrics"""
+
+    def test_middleware_not_used(self):
+        """Test that middleware removes itself when disabled"""
+        with self.assertRaises(MiddlewareNotUsed):
+            MetricsMiddleware(lambda request: None)
+
+    def test_metrics_not_found(self):
+        """Test that metrics are not exposed when disabled"""
+        res = self.client.get(METRICS)
+        self.assertEqual(res.status_code, 404)
@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import models, routers, utils
+from core.middleware import ReplicaRoutingMiddleware
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    """Tests for read replica routing"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = routers.ReplicaRouter()
+        self.middleware = ReplicaRoutingMiddleware(self.get_response)
+
+    def get_response(self, request):
+        """Record database chosen for reads during request"""
+        self.read_db = self.router.db_for_read(models.Visit)
+        return HttpResponse(status=getattr(request, 'status', 200))
+
+    def request(self, method, status=200, token='Token a'):
+        """Run request through middleware, returning read database"""
+        request = getattr(self.factory, method)(
+            '/', HTTP_AUTHORIZATION=token
+        )
+        request.status = status
+        self.middleware(request)
+        return self.read_db
+
+    def test_reads_outside_request_use_primary(self):
+        """Test that reads outside requests go to primary"""
+        self.assertEqual(self.router.db_for_read(models.Visit), 'default')
+        self.assertEqual(self.router.db_for_write(models.Visit), 'default')
+
+    def test_safe_request_uses_replica(self):
+        """Test that safe requests read from replica"""
+        replica_reads = routers.replica_reads.value
+        self.assertEqual(self.request('get'), 'replica')
+        self.assertEqual(routers.replica_reads.value, replica_reads + 1)
+        self.assertEqual(self.router.db_for_read(models.Visit), 'default')
+
+    def test_unsafe_request_uses_primary(self):
+        """Test that unsafe requests read from primary"""
+        self.assertEqual(self.request('post'), 'default')
+
+    def test_write_pins_client(self):
+        """Test that clients read their own writes from primary"""
+        self.request('patch')
+        self.assertEqual(self.request('get'), 'default')
+        self.assertEqual(self.request('get', token='Token b'), 'replica')
+
+    def test_login_pins_issued_token(self):
+        """Test that fresh tokens are read back from primary"""
+        utils.sample_user(cnic='sample_patient', group='patient')
+        res = APIClient().post(reverse('user:auth-token'), {
+            'cnic': 'sample_patient', 'password': 'testpass'
+        })
+        token = f'Token {res.data["token"]}'
+        self.assertEqual(self.request('get', token=token), 'default')
+        self.assertEqual(self.request('get'), 'replica')
+
+    def test_failed_write_does_not_pin(self):
+        """Test that rejected writes do not pin the client"""
+        self.request('post', status=400)
+        self.assertEqual(self.request('get'), 'replica')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test that routing is skipped without replicas"""
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaRoutingMiddleware(self.get_response)
+        primary_reads = routers.primary_reads.value
+        routers.set_read_from_replica(True)
+        try:
+            self.assertEqual(self.router.db_for_read(models.Visit), 'default')
+        finally:
+            routers.set_read_from_replica(False)
+        self.assertEqual(routers.primary_reads.value, primary_reads)
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from . import stats
+
+
+def metrics(request):
+    """Expose registered metrics in Prometheus text format"""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    values = None
+    if settings.METRICS_DIR:
+        values = stats.collect(settings.METRICS_DIR)
+    return HttpResponse(stats.render(values),
+                        content_type='text/plain; version=0.0.4')
@@ -0,0 +1 @@
+default_app_config = 'record.apps.RecordConfig'
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save
 
 
 class RecordConfig(AppConfig):
     name = 'record'
+
+    def ready(self):
+        """Connect signal receivers"""
+        from .search import SEARCH_FIELDS
+        from .signals import update_search_entry
+        for model in SEARCH_FIELDS:
+            post_save.connect(update_search_entry, sender=model)
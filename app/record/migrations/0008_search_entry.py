@@ -0,0 +1,99 @@
+# Generated by Django 2.2.28 on 2026-10-18 15:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+POSTGRES_INDEX = [
+    "ALTER TABLE record_searchentry ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', document)) STORED",
+    "CREATE INDEX searchentry_vector_idx ON record_searchentry "
+    "USING GIN (search_vector)",
+]
+
+SQLITE_INDEX = [
+    "CREATE VIRTUAL TABLE record_searchentry_fts USING fts5("
+    "document, content='record_searchentry', content_rowid='id', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER record_searchentry_ai AFTER INSERT ON record_searchentry "
+    "BEGIN INSERT INTO record_searchentry_fts(rowid, document) "
+    "VALUES (new.id, new.document); END",
+    "CREATE TRIGGER record_searchentry_ad AFTER DELETE ON record_searchentry "
+    "BEGIN INSERT INTO record_searchentry_fts(record_searchentry_fts, rowid, "
+    "document) VALUES ('delete', old.id, old.document); END",
+    "CREATE TRIGGER record_searchentry_au AFTER UPDATE ON record_searchentry "
+    "BEGIN INSERT INTO record_searchentry_fts(record_searchentry_fts, rowid, "
+    "document) VALUES ('delete', old.id, old.document); "
+    "INSERT INTO record_searchentry_fts(rowid, document) "
+    "VALUES (new.id, new.document); END",
+]
+
+SQLITE_UNINDEX = [
+    "DROP TRIGGER record_searchentry_ai",
+    "DROP TRIGGER record_searchentry_ad",
+    "DROP TRIGGER record_searchentry_au",
+    "DROP TABLE record_searchentry_fts",
+]
+
+BACKFILL = [
+    ('medical_history', 'record_medicalhistory', "description"),
+    ('visit', 'record_visit', "purpose"),
+    ('prescription', 'record_prescription', "medicine || ' ' || notes"),
+    ('allergy', 'record_allergy', "name || ' ' || description"),
+]
+
+
+def create_search_index(apps, schema_editor):
+    """Create full-text index of the database vendor & index records"""
+    vendor = schema_editor.connection.vendor
+    statements = {'postgresql': POSTGRES_INDEX,
+                  'sqlite': SQLITE_INDEX}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+    for record_type, table, document in BACKFILL:
+        schema_editor.execute(
+            f"INSERT INTO record_searchentry "
+            f"(type, object_id, document, patient_id, created_at) "
+            f"SELECT %s, id, {document}, patient_id, created_at "
+            f"FROM {table} WHERE deleted_at IS NULL", [record_type]
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    """Drop full-text index of the database vendor"""
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_UNINDEX:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('record', '0007_auto_20261018_1535'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('type', models.CharField(max_length=255)),
+                ('object_id', models.UUIDField()),
+                ('document', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('patient', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchentry',
+            index=models.Index(fields=['patient', 'created_at'], name='searchentry_patient_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('type', 'object_id'), name='searchentry_object_uniq'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
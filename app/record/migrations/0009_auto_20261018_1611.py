@@ -0,0 +1,45 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('record', '0008_search_entry'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='allergy',
+            name='allergy_deleted_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='medicalhistory',
+            name='medhistory_deleted_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='prescription',
+            name='prescription_deleted_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='visit',
+            name='visit_deleted_idx',
+        ),
+        migrations.AddIndex(
+            model_name='allergy',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='allergy_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalhistory',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='medhistory_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prescription',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='prescription_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='visit_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+RECORD_MODELS = ('MedicalHistory', 'Visit', 'Prescription', 'Allergy')
+
+
+def delete_records_of_deleted_patients(apps, schema_editor):
+    """Soft delete records & search entries of already deleted patients,
+    which record managers no longer hide through the patient"""
+    deleted_at = Subquery(apps.get_model('user', 'User').objects.filter(
+        pk=OuterRef('patient_id')
+    ).values('deleted_at')[:1])
+    for name in RECORD_MODELS:
+        apps.get_model('record', name).objects.filter(
+            deleted_at__isnull=True, patient__deleted_at__isnull=False
+        ).update(deleted_at=deleted_at, updated_at=deleted_at)
+    apps.get_model('record', 'SearchEntry').objects.filter(
+        patient__deleted_at__isnull=False
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('record', '0009_auto_20261018_1611'),
+        ('user', '0013_auto_20261018_1611'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_records_of_deleted_patients,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+from django.db import connection
+
+from core.models import MedicalHistory, Visit, Prescription, Allergy, \
+    SearchEntry
+
+
+SEARCH_FIELDS = {
+    MedicalHistory: ('medical_history', ('description', )),
+    Visit: ('visit', ('purpose', )),
+    Prescription: ('prescription', ('medicine', 'notes')),
+    Allergy: ('allergy', ('name', 'description')),
+}
+
+
+def get_document(instance):
+    """Return searchable text of record"""
+    record_type, fields = SEARCH_FIELDS[type(instance)]
+    return ' '.join(getattr(instance, field) or '' for field in fields)
+
+
+def get_entry(instance):
+    """Return unsaved search entry of record"""
+    return SearchEntry(
+        type=SEARCH_FIELDS[type(instance)][0], object_id=instance.pk,
+        document=get_document(instance), patient_id=instance.patient_id,
+        created_at=instance.created_at
+    )
+
+
+def index_record(instance, created=False):
+    """Insert or refresh search entry of record"""
+    entry = get_entry(instance)
+    if not created and SearchEntry.objects.filter(
+        type=entry.type, object_id=entry.object_id
+    ).update(document=entry.document, patient_id=entry.patient_id):
+        return
+    entry.save(force_insert=True)
+
+
+def index_records(instances):
+    """Insert search entries of freshly created records"""
+    SearchEntry.objects.bulk_create([
+        get_entry(instance) for instance in instances
+    ])
+
+
+def unindex_record(instance):
+    """Remove search entry of record"""
+    SearchEntry.objects.filter(
+        type=SEARCH_FIELDS[type(instance)][0], object_id=instance.pk
+    ).delete()
+
+
+def search(queryset, query):
+    """Filter search entries matching query & annotate their rank"""
+    if connection.vendor == 'postgresql':
+        return queryset.extra(
+            select={'rank': "ts_rank(search_vector, "
+                            "plainto_tsquery('english', %s))"},
+            select_params=[query],
+            where=["search_vector @@ plainto_tsquery('english', %s)"],
+            params=[query]
+        )
+    if connection.vendor == 'sqlite':
+        return queryset.extra(
+            select={'rank': '-bm25(record_searchentry_fts)'},
+            tables=['record_searchentry_fts'],
+            where=['record_searchentry_fts.rowid = record_searchentry.id',
+                   'record_searchentry_fts MATCH %s'],
+            params=[get_fts_query(query)]
+        )
+    return queryset.filter(document__icontains=query).extra(
+        select={'rank': '0'}
+    )
+
+
+def get_fts_query(query):
+    """Quote every term so FTS5 matches them all, ignoring its syntax"""
+    return ' '.join(
+        '"{}"'.format(term.replace('"', '""')) for term in query.split()
+    )
@@ -1,20 +1,62 @@
+from uuid import UUID
+
 from rest_framework import serializers
 
-from core.models import MedicalHistory, Visit, Allergy, Prescription, User
+from core.models import MedicalHistory, Visit, Allergy, Prescription, \
+    Tombstone, User
 from core.serializers import ModelBySerializer
-from user.serializers import UserSerializer
+from user.serializers import EmbeddedUserSerializer, UserSummarySerializer
 
 
-class MedicalHistorySerializer(ModelBySerializer):
-    """Serializer for MedicalHistory model"""
+EXPANDABLE_FIELDS = ('patient', 'created_by', 'updated_by')
+
+
+def get_expanded_fields(request):
+    """Return user fields requested in full through ?expand="""
+    if request is None:
+        return ()
+    expand = request.query_params.get('expand', '').split(',')
+    return tuple(field for field in EXPANDABLE_FIELDS if field in expand)
+
+
+class PatientPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolve patients from lookup in context when provided"""
+
+    def to_internal_value(self, data):
+        """Avoid one query per item for bulk payloads"""
+        patients = self.context.get('patients', None)
+        if patients is None:
+            return super(PatientPrimaryKeyRelatedField,
+                         self).to_internal_value(data)
+        try:
+            return patients[UUID(str(data))]
+        except ValueError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
 
-    created_by = UserSerializer(read_only=True)
-    updated_by = UserSerializer(read_only=True)
-    patient = UserSerializer(read_only=True, required=False)
-    patient_id = serializers.PrimaryKeyRelatedField(
+
+class RecordSerializer(ModelBySerializer):
+    """Embed user summaries in records unless expanded"""
+
+    created_by = UserSummarySerializer(read_only=True)
+    updated_by = UserSummarySerializer(read_only=True)
+    patient = UserSummarySerializer(read_only=True, required=False)
+    patient_id = PatientPrimaryKeyRelatedField(
         source='patient', queryset=User.objects.all()
     )
 
+    def get_fields(self):
+        """Swap summaries for full users on expanded fields"""
+        fields = super(RecordSerializer, self).get_fields()
+        for field in get_expanded_fields(self.context.get('request')):
+            fields[field] = EmbeddedUserSerializer(read_only=True)
+        return fields
+
+
+class MedicalHistorySerializer(RecordSerializer):
+    """Serializer for MedicalHistory model"""
+
     class Meta:
         model = MedicalHistory
         fields = ('id', 'type', 'description', 'happened_at',
@@ -24,16 +66,9 @@ class MedicalHistorySerializer(ModelBySerializer):
                             'created_by', 'updated_by')
 
 
-class VisitSerializer(ModelBySerializer):
+class VisitSerializer(RecordSerializer):
     """Serializer for Visit model"""
 
-    created_by = UserSerializer(read_only=True)
-    updated_by = UserSerializer(read_only=True)
-    patient = UserSerializer(read_only=True, required=False)
-    patient_id = serializers.PrimaryKeyRelatedField(
-        source='patient', queryset=User.objects.all()
-    )
-
     class Meta:
         model = Visit
         fields = ('id', 'purpose', 'visited_at',
@@ -43,16 +78,9 @@ class VisitSerializer(ModelBySerializer):
                             'created_by', 'updated_by')
 
 
-class AllergySerializer(ModelBySerializer):
+class AllergySerializer(RecordSerializer):
     """Serializer for Allergy model"""
 
-    created_by = UserSerializer(read_only=True)
-    updated_by = UserSerializer(read_only=True)
-    patient = UserSerializer(read_only=True, required=False)
-    patient_id = serializers.PrimaryKeyRelatedField(
-        source='patient', queryset=User.objects.all()
-    )
-
     class Meta:
         model = Allergy
         fields = ('id', 'name', 'description',
@@ -62,16 +90,9 @@ class AllergySerializer(ModelBySerializer):
                             'created_by', 'updated_by')
 
 
-class PrescriptionSerializer(ModelBySerializer):
+class PrescriptionSerializer(RecordSerializer):
     """Serializer for Prescription model"""
 
-    created_by = UserSerializer(read_only=True)
-    updated_by = UserSerializer(read_only=True)
-    patient = UserSerializer(read_only=True, required=False)
-    patient_id = serializers.PrimaryKeyRelatedField(
-        source='patient', queryset=User.objects.all()
-    )
-
     class Meta:
         model = Prescription
         fields = ('id', 'medicine', 'dose', 'frequency', 'notes',
@@ -79,3 +100,12 @@ class PrescriptionSerializer(ModelBySerializer):
                   'updated_by', 'patient_id')
         read_only_fields = ('id', 'created_at', 'updated_at',
                             'created_by', 'updated_by')
+
+
+class TombstoneSerializer(serializers.ModelSerializer):
+    """Serializer for Tombstone model"""
+
+    class Meta:
+        model = Tombstone
+        fields = ('id', 'type', 'object_id', 'patient_id', 'deleted_at')
+        read_only_fields = fields
@@ -0,0 +1,19 @@
+from . import search
+
+
+SEARCH_UPDATE_FIELDS = {'deleted_at', 'patient'}
+
+
+def update_search_entry(sender, instance, created=False, update_fields=None,
+                        raw=False, **kwargs):
+    """Keep search entry of saved record in step with its text"""
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & (
+        SEARCH_UPDATE_FIELDS | set(search.SEARCH_FIELDS[sender][1])
+    ):
+        return
+    if instance.deleted_at is not None:
+        search.unindex_record(instance)
+    else:
+        search.index_record(instance, created)
@@ -1,15 +1,24 @@
+import json
+
+from datetime import timedelta
 from uuid import uuid4
+from unittest.mock import patch
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import http_date
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from core import models
+from core import response_cache
 from core import utils
-from .. import serializers
+from user.serializers import UserSerializer, UserSummarySerializer
+from .. import serializers, views
 
 
 MEDICAL_HISTORY_VIEW = reverse('record:medical_history-view')
@@ -17,6 +26,18 @@ VISIT_VIEW = reverse('record:visit-view')
 ALLERGY_VIEW = reverse('record:allergy-view')
 PRESCRIPTION_VIEW = reverse('record:prescription-view')
 
+MEDICAL_HISTORY_EXPORT = reverse('record:medical_history-export')
+VISIT_EXPORT = reverse('record:visit-export')
+ALLERGY_EXPORT = reverse('record:allergy-export')
+PRESCRIPTION_EXPORT = reverse('record:prescription-export')
+
+VISIT_BULK = reverse('record:visit-bulk')
+PRESCRIPTION_BULK = reverse('record:prescription-bulk')
+
+TIMELINE_VIEW = reverse('record:timeline-view')
+TOMBSTONE_VIEW = reverse('record:tombstone-view')
+SEARCH_VIEW = reverse('record:search-view')
+
 
 def medical_history_detail(pk):
     """Creates MEDICAL_HISTORY_DETAIL"""
@@ -85,9 +106,10 @@ class MedicalHistoryPrivateApiTests(TestCase):
         medical_history = utils.sample_medical_history(patient=self.patient)
         res = self.client.get(MEDICAL_HISTORY_VIEW)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data[0], serializers.MedicalHistorySerializer(
-            medical_history
-        ).data)
+        self.assertEqual(
+            res.data['results'][0],
+            serializers.MedicalHistorySerializer(medical_history).data
+        )
 
     def test_medical_history_post(self):
         """Test that post method is allowed"""
@@ -174,9 +196,10 @@ class VisitPrivateApiTests(TestCase):
         visit = utils.sample_visit(patient=self.patient)
         res = self.client.get(VISIT_VIEW)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data[0], serializers.VisitSerializer(
-            visit
-        ).data)
+        self.assertEqual(
+            res.data['results'][0],
+            serializers.VisitSerializer(visit).data
+        )
 
     def test_visit_post(self):
         """Test that post method is allowed"""
@@ -264,9 +287,10 @@ class AllergyPrivateApiTests(TestCase):
         allergy = utils.sample_allergy(patient=self.patient)
         res = self.client.get(ALLERGY_VIEW)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data[0], serializers.AllergySerializer(
-            allergy
-        ).data)
+        self.assertEqual(
+            res.data['results'][0],
+            serializers.AllergySerializer(allergy).data
+        )
 
     def test_allergy_post(self):
         """Test that post method is allowed"""
@@ -353,9 +377,10 @@ class PrescriptionPrivateApiTests(TestCase):
         prescription = utils.sample_prescription(patient=self.patient)
         res = self.client.get(PRESCRIPTION_VIEW)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data[0], serializers.PrescriptionSerializer(
-            prescription
-        ).data)
+        self.assertEqual(
+            res.data['results'][0],
+            serializers.PrescriptionSerializer(prescription).data
+        )
 
     def test_prescription_post(self):
         """Test that post method is allowed"""
@@ -394,3 +419,779 @@ class PrescriptionPrivateApiTests(TestCase):
         self.assertFalse(models.Prescription.objects.filter(
             id=prescription.id
         ).exists())
+
+
+class RecordQueryCountTests(TestCase):
+    """Tests for number of queries issued by record list endpoints"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = utils.sample_user(group='admin')
+        self.client.force_authenticate(user=self.admin)
+        self.doctor = utils.sample_user(cnic='sample_doctor', group='doctor')
+        self.nurse = utils.sample_user(cnic='sample_nurse', group='nurse')
+
+    def assert_constant_queries(self, url, sample):
+        """Assert that listing is a single query regardless of row count"""
+        for count in (1, 5):
+            for index in range(count):
+                patient = utils.sample_user(
+                    cnic=f'sample_patient_{count}_{index}', group='patient'
+                )
+                sample(patient=patient, created_by=self.doctor,
+                       updated_by=self.nurse)
+            for params in ({}, {'expand': 'patient,created_by,updated_by'}):
+                with self.assertNumQueries(1):
+                    res = self.client.get(url, params)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_medical_history_get_queries(self):
+        """Test that medical histories are listed in constant queries"""
+        self.assert_constant_queries(MEDICAL_HISTORY_VIEW,
+                                     utils.sample_medical_history)
+
+    def test_visit_get_queries(self):
+        """Test that visits are listed in constant queries"""
+        self.assert_constant_queries(VISIT_VIEW, utils.sample_visit)
+
+    def test_allergy_get_queries(self):
+        """Test that allergies are listed in constant queries"""
+        self.assert_constant_queries(ALLERGY_VIEW, utils.sample_allergy)
+
+    def test_prescription_get_queries(self):
+        """Test that prescriptions are listed in constant queries"""
+        self.assert_constant_queries(PRESCRIPTION_VIEW,
+                                     utils.sample_prescription)
+
+
+class RecordPaginationTests(TestCase):
+    """Tests for keyset pagination of record list endpoints"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = utils.sample_user(group='admin')
+        self.client.force_authenticate(user=self.admin)
+        self.patient = utils.sample_user(cnic='sample_patient',
+                                         group='patient')
+        self.visits = [utils.sample_visit(patient=self.patient)
+                       for _ in range(5)]
+
+    def test_visit_get_pages(self):
+        """Test that next links walk every row exactly once in order"""
+        ids = []
+        url = f'{VISIT_VIEW}?page_size=2'
+        while url is not None:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            ids += [visit['id'] for visit in res.data['results']]
+            url = res.data['next']
+
+        expected = models.Visit.objects.order_by('created_at', 'id')
+        self.assertEqual(ids, [str(visit.id) for visit in expected])
+
+    def test_visit_get_previous_page(self):
+        """Test that previous link returns the preceding page"""
+        first = self.client.get(f'{VISIT_VIEW}?page_size=2')
+        self.assertIsNone(first.data['previous'])
+
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+        self.assertEqual(previous.data['results'], first.data['results'])
+
+    def test_visit_get_invalid_cursor(self):
+        """Test that invalid cursor is rejected"""
+        res = self.client.get(VISIT_VIEW, {'cursor': 'invalid'})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RecordExportTests(TestCase):
+    """Tests for streaming export of record endpoints"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = utils.sample_user(group='admin')
+        self.client.force_authenticate(user=self.admin)
+        self.patient = utils.sample_user(cnic='sample_patient',
+                                         group='patient')
+
+    def export(self, url):
+        """Return decoded rows of streamed export"""
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        content = b''.join(res.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_visit_export(self):
+        """Test that every visit is streamed in order"""
+        for _ in range(3):
+            utils.sample_visit(patient=self.patient)
+        rows = self.export(VISIT_EXPORT)
+        expected = models.Visit.objects.order_by('created_at', 'id')
+        self.assertEqual([row['id'] for row in rows],
+                         [str(visit.id) for visit in expected])
+
+    def test_export_chunks(self):
+        """Test that rows spanning several chunks are all streamed"""
+        for _ in range(5):
+            utils.sample_allergy(patient=self.patient)
+        with patch.object(views.AllergyViewSet, 'export_chunk_size', 2):
+            rows = self.export(ALLERGY_EXPORT)
+        self.assertEqual(len(rows), 5)
+
+    def test_export_scope(self):
+        """Test that patients only export their own records"""
+        other = utils.sample_user(cnic='other_patient', group='patient')
+        utils.sample_prescription(patient=self.patient)
+        utils.sample_prescription(patient=other)
+        self.client.force_authenticate(user=self.patient)
+        rows = self.export(PRESCRIPTION_EXPORT)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['patient']['id'], str(self.patient.id))
+
+    def test_medical_history_export(self):
+        """Test that medical histories are exported"""
+        utils.sample_medical_history(patient=self.patient)
+        self.assertEqual(len(self.export(MEDICAL_HISTORY_EXPORT)), 1)
+
+
+class RecordExpandTests(TestCase):
+    """Tests for embedded users in record payloads"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = utils.sample_user(group='admin')
+        self.client.force_authenticate(user=self.admin)
+        self.patient = utils.sample_user(cnic='sample_patient',
+                                         group='patient')
+        self.visit = utils.sample_visit(patient=self.patient,
+                                        created_by=self.admin,
+                                        updated_by=self.admin)
+
+    def test_visit_get_summary(self):
+        """Test that embedded users are summarized by default"""
+        res = self.client.get(visit_detail(self.visit.id))
+        self.assertEqual(res.data['patient'], UserSummarySerializer(
+            self.patient
+        ).data)
+        self.assertNotIn('role', res.data['created_by'])
+
+    def test_visit_get_expand(self):
+        """Test that requested users are embedded in full"""
+        res = self.client.get(visit_detail(self.visit.id),
+                              {'expand': 'patient,created_by'})
+        self.assertEqual(res.data['patient'], UserSerializer(
+            self.patient
+        ).data)
+        self.assertIn('role', res.data['created_by'])
+        self.assertNotIn('role', res.data['updated_by'])
+
+    def test_visit_list_expand_serializes_users_once(self):
+        """Test that repeated embedded users are serialized once"""
+        for index in range(9):
+            utils.sample_visit(patient=self.patient, created_by=self.admin,
+                               updated_by=self.admin)
+
+        with patch.object(UserSerializer, 'get_role',
+                          return_value=None) as get_role:
+            res = self.client.get(VISIT_VIEW, {
+                'patient': self.patient.id,
+                'expand': 'patient,created_by,updated_by'
+            })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 10)
+        self.assertEqual(get_role.call_count, 2)
+        self.assertEqual(res.data['results'][-1]['created_by']['id'],
+                         str(self.admin.id))
+
+
+class TimelineApiTests(TestCase):
+    """Tests for patient timeline across records"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = utils.sample_user(group='admin')
+        self.client.force_authenticate(user=self.admin)
+        self.patient = utils.sample_user(cnic='sample_patient',
+                                         group='patient')
+        self.records = [
+            utils.sample_visit(patient=self.patient),
+            utils.sample_allergy(patient=self.patient),
+            utils.sample_medical_history(patient=self.patient),
+            utils.sample_prescription(patient=self.patient),
+            utils.sample_visit(patient=self.patient),
+        ]
+
+    def test_timeline_get(self):
+        """Test that records of all types are merged in order"""
+        utils.sample_visit(patient=utils.sample_user(cnic='other_patient',
+                                                     group='patient'))
+        res = self.client.get(TIMELINE_VIEW, {'patient': self.patient.id})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['type'], row['record']['id'])
+             for row in res.data['results']],
+            [('visit', str(self.records[0].id)),
+             ('allergy', str(self.records[1].id)),
+             ('medical_history', str(self.records[2].id)),
+             ('prescription', str(self.records[3].id)),
+             ('visit', str(self.records[4].id))]
+        )
+
+    def test_timeline_get_pages(self):
+        """Test that next links walk the merged timeline"""
+        ids = []
+        url = f'{TIMELINE_VIEW}?patient={self.patient.id}&page_size=2'
+        with self.assertNumQueries(4):
+            res = self.client.get(url)
+        while url is not None:
+            res = self.client.get(url)
+            ids += [row['record']['id'] for row in res.data['results']]
+            url = res.data['next']
+        self.assertEqual(ids, [str(record.id) for record in self.records])
+
+    def test_timeline_patient_required(self):
+        """Test that staff must pick a patient"""
+        res = self.client.get(TIMELINE_VIEW)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_timeline_patient_invalid(self):
+        """Test that malformed patient ids are rejected"""
+        res = self.client.get(TIMELINE_VIEW, {'patient': 'abc'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('patient', res.data)
+        res = self.client.get(VISIT_VIEW, {'patient': 'abc'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_timeline_patient_scope(self):
+        """Test that patients only see their own timeline"""
+        other = utils.sample_user(cnic='other_patient', group='patient')
+        utils.sample_visit(patient=other)
+        self.client.force_authenticate(user=self.patient)
+        res = self.client.get(TIMELINE_VIEW, {'patient': other.id})
+        self.assertEqual(len(res.data['results']), len(self.records))
+
+
+class RecordBulkCreateTests(TestCase):
+    """Tests for bulk creation of records"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.doctor = utils.sample_user(cnic='sample_doctor', group='doctor')
+        self.client.force_authenticate(user=self.doctor)
+        self.patients = [
+            utils.sample_user(cnic=f'sample_patient_{index}', group='patient')
+            for index in range(3)
+        ]
+
+    def test_visit_bulk_post(self):
+        """Test that visits are validated & inserted in bulk"""
+        payload = [{'patient_id': str(patient.id),
+                    'visited_at': timezone.now().isoformat()}
+                   for patient in self.patients]
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(VISIT_BULK, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), len(payload))
+        self.assertEqual(models.Visit.objects.filter(
+            created_by=self.doctor, updated_by=self.doctor
+        ).count(), len(payload))
+
+        # Visits & search entries are inserted in one statement each. The
+        # day they are counted under misses its UPDATE & is inserted, the
+        # only writes of the analytics rollup.
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertEqual(statements.count('SELECT'), 1)
+        self.assertEqual(statements.count('INSERT'), 3)
+        self.assertEqual(statements.count('UPDATE'), 1)
+        self.assertEqual(models.SearchEntry.objects.filter(
+            type='visit'
+        ).count(), len(payload))
+
+    def test_prescription_bulk_post_errors(self):
+        """Test that per item errors are returned and nothing is written"""
+        payload = [
+            {'medicine': 'test', 'patient_id': str(self.patients[0].id)},
+            {'patient_id': str(self.patients[1].id)},
+            {'medicine': 'test', 'patient_id': str(uuid4())},
+            {'medicine': 'test', 'patient_id': 'invalid'},
+        ]
+        res = self.client.post(PRESCRIPTION_BULK, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('medicine', res.data[1])
+        self.assertIn('patient_id', res.data[2])
+        self.assertIn('patient_id', res.data[3])
+        self.assertFalse(models.Prescription.objects.exists())
+
+    def test_bulk_post_requires_list(self):
+        """Test that single objects are rejected"""
+        payload = {'medicine': 'test', 'patient_id': str(self.patients[0].id)}
+        res = self.client.post(PRESCRIPTION_BULK, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecordWriteQueryTests(TestCase):
+    """Tests for number of record writes issued by record mutations"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.doctor = utils.sample_user(cnic='sample_doctor', group='doctor')
+        self.client.force_authenticate(user=self.doctor)
+        self.patient = utils.sample_user(cnic='sample_patient',
+                                         group='patient')
+
+    def assert_single_write(self, method, url, payload, expected_status,
+                            rollup_writes=0):
+        """Assert that request issues exactly one write query, besides
+        rollup_writes maintaining analytics"""
+        with CaptureQueriesContext(connection) as queries:
+            res = getattr(self.client, method)(url, payload)
+        self.assertEqual(res.status_code, expected_status)
+
+        writes = [query['sql'] for query in queries
+                  if query['sql'].split()[0] in ('INSERT', 'UPDATE') and
+                  'record_searchentry' not in query['sql']]
+        self.assertEqual(len(writes), 1 + rollup_writes, writes)
+        self.assertEqual(len([sql for sql in writes if 'analytics_' in sql]),
+                         rollup_writes, writes)
+        return res
+
+    def assert_single_writes(self, view_url, detail_url, payload, update,
+                             rollup_writes=(0, 0)):
+        """Assert that create & update write once and set audit fields"""
+        payload = {'patient_id': self.patient.id, **payload}
+        res = self.assert_single_write('post', view_url, payload,
+                                       status.HTTP_201_CREATED,
+                                       rollup_writes[0])
+        self.assertEqual(res.data['created_by']['id'], str(self.doctor.id))
+        self.assertEqual(res.data['updated_by']['id'], str(self.doctor.id))
+
+        res = self.assert_single_write('patch', detail_url(res.data['id']),
+                                       update, status.HTTP_200_OK,
+                                       rollup_writes[1])
+        for key, value in update.items():
+            self.assertEqual(res.data[key], value)
+        self.assertEqual(res.data['updated_by']['id'], str(self.doctor.id))
+
+    def test_medical_history_writes(self):
+        """Test that medical histories are written once"""
+        self.assert_single_writes(MEDICAL_HISTORY_VIEW,
+                                  medical_history_detail,
+                                  {'type': 'test'}, {'type': 'updated'})
+
+    def test_visit_writes(self):
+        """Test that visits are written once"""
+        # Counting the first visit of a day misses its UPDATE & inserts it,
+        # purpose is not counted
+        self.assert_single_writes(VISIT_VIEW, visit_detail,
+                                  {'visited_at': timezone.now()},
+                                  {'purpose': 'updated'}, (2, 0))
+
+    def test_allergy_writes(self):
+        """Test that allergies are written once"""
+        self.assert_single_writes(ALLERGY_VIEW, allergy_detail,
+                                  {'name': 'test'}, {'name': 'updated'})
+
+    def test_prescription_writes(self):
+        """Test that prescriptions are written once"""
+        # Counting a new medicine misses its UPDATE & inserts it, renaming
+        # also uncounts the previous medicine
+        self.assert_single_writes(PRESCRIPTION_VIEW, prescription_detail,
+                                  {'medicine': 'test'},
+                                  {'medicine': 'updated'}, (2, 3))
+
+
+class RecordConditionalGetTests(TestCase):
+    """Tests for conditional GET of record endpoints"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.doctor = utils.sample_user(cnic='sample_doctor', group='doctor')
+        self.client.force_authenticate(user=self.doctor)
+        self.patient = utils.sample_user(cnic='sample_patient',
+                                         group='patient')
+        self.visit = utils.sample_visit(patient=self.patient)
+
+    def test_visit_detail_not_modified(self):
+        """Test that unchanged visit is answered without serializing"""
+        res = self.client.get(visit_detail(self.visit.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', res)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(visit_detail(self.visit.id),
+                                  HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_visit_detail_modified(self):
+        """Test that changed visit is served in full"""
+        etag = self.client.get(visit_detail(self.visit.id))['ETag']
+        self.client.patch(visit_detail(self.visit.id), {'purpose': 'test'})
+
+        res = self.client.get(visit_detail(self.visit.id),
+                              HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['purpose'], 'test')
+
+    def test_visit_detail_missing(self):
+        """Test that missing visits are still not found"""
+        res = self.client.get(visit_detail(uuid4()))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_visit_detail_malformed_id(self):
+        """Test that malformed ids are not found"""
+        res = self.client.get(visit_detail('not-a-uuid'))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_embedded_user_modified(self):
+        """Test that changes to embedded users are served in full"""
+        params = {'patient': self.patient.id}
+        detail_etag = self.client.get(visit_detail(self.visit.id))['ETag']
+        list_etag = self.client.get(VISIT_VIEW, params)['ETag']
+
+        self.client.force_authenticate(user=utils.sample_user(
+            cnic='sample_admin', group='admin'
+        ))
+        res = self.client.patch(reverse('user:user-detail',
+                                        args=[self.patient.id]),
+                                {'first_name': 'Renamed'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=self.doctor)
+
+        res = self.client.get(visit_detail(self.visit.id),
+                              HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(VISIT_VIEW, params,
+                              HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'][0]['patient']['first_name'], 'Renamed'
+        )
+
+    def test_visit_list_not_modified(self):
+        """Test that unchanged patient scoped list is not re-sent"""
+        params = {'patient': self.patient.id}
+        etag = self.client.get(VISIT_VIEW, params)['ETag']
+
+        res = self.client.get(VISIT_VIEW, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.post(VISIT_VIEW, {'visited_at': timezone.now(),
+                                      'patient_id': self.patient.id})
+        res = self.client.get(VISIT_VIEW, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_visit_list_deleted(self):
+        """Test that deleting a listed visit is served in full"""
+        params = {'patient': self.patient.id}
+        res = self.client.get(VISIT_VIEW, params)
+        self.assertNotIn('Last-Modified', res)
+        etag = res['ETag']
+
+        self.client.delete(visit_detail(self.visit.id))
+        res = self.client.get(VISIT_VIEW, params,
+                              HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
+        res = self.client.get(VISIT_VIEW, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_visit_list_body_matches_etag(self):
+        """Test that lists changed out of band are not served from cache
+        under their new validators"""
+        params = {'patient': self.patient.id}
+        self.client.get(VISIT_VIEW, params)
+        models.Visit.objects.filter(pk=self.visit.pk).update(
+            purpose='changed', updated_at=timezone.now()
+        )
+
+        res = self.client.get(VISIT_VIEW, params)
+        self.assertEqual(res.data['results'][0]['purpose'], 'changed')
+
+    def test_visit_list_unscoped(self):
+        """Test that unscoped lists are not conditional"""
+        res = self.client.get(VISIT_VIEW)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', res)
+
+
+class RecordSyncTests(TestCase):
+    """Tests for incremental sync of records"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.doctor = utils.sample_user(cnic='sample_doctor', group='doctor')
+        self.client.force_authenticate(user=self.doctor)
+        self.patient = utils.sample_user(cnic='sample_patient',
+                                         group='patient')
+        self.since = timezone.now()
+        self.stale = utils.sample_visit(patient=self.patient)
+        models.Visit.objects.filter(id=self.stale.id).update(
+            updated_at=self.since - timedelta(days=1)
+        )
+        self.fresh = utils.sample_visit(patient=self.patient)
+
+    def test_visit_updated_since(self):
+        """Test that only rows changed since timestamp are listed"""
+        res = self.client.get(VISIT_VIEW, {
+            'updated_since': self.since.isoformat()
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([visit['id'] for visit in res.data['results']],
+                         [str(self.fresh.id)])
+
+    def test_timeline_updated_since(self):
+        """Test that timeline is restricted to changed rows"""
+        res = self.client.get(TIMELINE_VIEW, {
+            'patient': self.patient.id,
+            'updated_since': self.since.isoformat()
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_updated_since_invalid(self):
+        """Test that malformed timestamps are rejected"""
+        res = self.client.get(VISIT_VIEW, {'updated_since': 'yesterday'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('updated_since', res.data)
+
+    def test_tombstone_patient_invalid(self):
+        """Test that malformed patient ids are rejected"""
+        res = self.client.get(TOMBSTONE_VIEW, {'patient': 'abc'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('patient', res.data)
+
+    def test_destroy_tombstone(self):
+        """Test that destroyed rows are listed as tombstones"""
+        res = self.client.delete(visit_detail(self.fresh.id))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        res = self.client.get(TOMBSTONE_VIEW, {
+            'patient': self.patient.id,
+            'updated_since': self.since.isoformat()
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        tombstone = res.data['results'][0]
+        self.assertEqual(tombstone['type'], 'visit')
+        self.assertEqual(tombstone['object_id'], str(self.fresh.id))
+        self.assertEqual(tombstone['patient_id'], str(self.patient.id))
+
+    def test_tombstone_patient_scope(self):
+        """Test that patients only see their own tombstones"""
+        other = utils.sample_user(cnic='other_patient', group='patient')
+        visit = utils.sample_visit(patient=other)
+        self.client.delete(visit_detail(visit.id))
+        self.client.delete(visit_detail(self.fresh.id))
+
+        self.client.force_authenticate(user=self.patient)
+        res = self.client.get(TOMBSTONE_VIEW)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['object_id'] for row in res.data['results']],
+                         [str(self.fresh.id)])
+
+
+class RecordSoftDeleteTests(TestCase):
+    """Tests for soft deletion of records & patients"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = utils.sample_user(cnic='sample_admin', group='admin')
+        self.client.force_authenticate(user=self.admin)
+        self.patient = utils.sample_user(cnic='sample_patient',
+                                         group='patient')
+        self.visit = utils.sample_visit(patient=self.patient)
+
+    def test_visit_soft_delete(self):
+        """Test that destroyed visits are hidden but kept until purged"""
+        res = self.client.delete(visit_detail(self.visit.id))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertFalse(models.Visit.objects.exists())
+        self.assertIsNotNone(
+            models.Visit.all_objects.get(id=self.visit.id).deleted_at
+        )
+        res = self.client.get(VISIT_VIEW)
+        self.assertEqual(res.data['results'], [])
+        res = self.client.get(visit_detail(self.visit.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_patient_soft_delete(self):
+        """Test that records of deleted patients are soft deleted with it"""
+        deleted = utils.sample_visit(patient=self.patient)
+        self.client.delete(visit_detail(deleted.id))
+        deleted.refresh_from_db()
+        res = self.client.delete(
+            reverse('user:user-detail', args=[self.patient.id])
+        )
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.patient.refresh_from_db()
+        self.assertEqual(
+            models.Visit.all_objects.get(id=self.visit.id).deleted_at,
+            self.patient.deleted_at
+        )
+        self.assertEqual(
+            models.Visit.all_objects.get(id=deleted.id).deleted_at,
+            deleted.deleted_at
+        )
+        self.assertFalse(models.SearchEntry.objects.filter(
+            patient=self.patient
+        ).exists())
+        res = self.client.get(VISIT_VIEW)
+        self.assertEqual(res.data['results'], [])
+        res = self.client.get(TIMELINE_VIEW, {'patient': self.patient.id})
+        self.assertEqual(res.data['results'], [])
+
+
+class RecordResponseCacheTests(TestCase):
+    """Tests for cached patient scoped record lists"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.doctor = utils.sample_user(cnic='sample_doctor', group='doctor')
+        self.client.force_authenticate(user=self.doctor)
+        self.patient = utils.sample_user(cnic='sample_patient',
+                                         group='patient')
+        self.visit = utils.sample_visit(patient=self.patient,
+                                        created_by=self.doctor,
+                                        updated_by=self.doctor)
+        self.params = {'patient': self.patient.id}
+        self.client.get(VISIT_VIEW, self.params)
+
+    def test_visit_list_cached(self):
+        """Test that repeated lists are served without paginating"""
+        hits = response_cache.hits.value
+        with self.assertNumQueries(1):
+            res = self.client.get(VISIT_VIEW, self.params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(response_cache.hits.value, hits + 1)
+
+    def test_visit_list_update_invalidates(self):
+        """Test that updates through the API expire cached lists"""
+        self.client.patch(visit_detail(self.visit.id), {'purpose': 'test'})
+        res = self.client.get(VISIT_VIEW, self.params)
+        self.assertEqual(res.data['results'][0]['purpose'], 'test')
+
+    def test_visit_list_delete_invalidates(self):
+        """Test that deletes through the API expire cached lists"""
+        self.client.delete(visit_detail(self.visit.id))
+        res = self.client.get(VISIT_VIEW, self.params)
+        self.assertEqual(res.data['results'], [])
+
+    def test_visit_list_bulk_create_invalidates(self):
+        """Test that bulk creation expires cached lists"""
+        self.client.post(VISIT_BULK, [
+            {'visited_at': timezone.now(), 'patient_id': self.patient.id}
+        ], format='json')
+        res = self.client.get(VISIT_VIEW, self.params)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_visit_list_patient_update_invalidates(self):
+        """Test that updating the patient expires cached lists"""
+        admin = utils.sample_user(cnic='sample_admin', group='admin')
+        self.client.force_authenticate(user=admin)
+        self.client.patch(reverse('user:user-detail', args=[self.patient.id]),
+                          {'first_name': 'test'})
+        res = self.client.get(VISIT_VIEW, self.params)
+        self.assertEqual(res.data['results'][0]['patient']['first_name'],
+                         'test')
+
+    def test_visit_list_staff_update_invalidates(self):
+        """Test that updating an embedded staff user expires cached lists"""
+        admin = utils.sample_user(cnic='sample_admin', group='admin')
+        self.client.force_authenticate(user=admin)
+        res = self.client.patch(
+            reverse('user:user-detail', args=[self.doctor.id]),
+            {'first_name': 'Renamed'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.doctor)
+        res = self.client.get(VISIT_VIEW, self.params)
+        self.assertEqual(
+            res.data['results'][0]['created_by']['first_name'], 'Renamed'
+        )
+
+
+class RecordSearchTests(TestCase):
+    """Tests for full-text search across records"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.doctor = utils.sample_user(cnic='sample_doctor', group='doctor')
+        self.client.force_authenticate(user=self.doctor)
+        self.patient = utils.sample_user(cnic='sample_patient',
+                                         group='patient')
+        self.other = utils.sample_user(cnic='other_patient', group='patient')
+        self.prescription = utils.sample_prescription(
+            patient=self.patient, medicine='Amoxicillin',
+            notes='Take after meals'
+        )
+        self.allergy = utils.sample_allergy(
+            patient=self.patient, name='Penicillin',
+            description='Rash after amoxicillin course'
+        )
+        utils.sample_visit(patient=self.other, purpose='Amoxicillin refill')
+
+    def search(self, **params):
+        """Return hits of search request"""
+        res = self.client.get(SEARCH_VIEW, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data['results']
+
+    def test_search_ranked(self):
+        """Test that matching records are returned by relevance"""
+        hits = self.search(q='amoxicillin', patient=self.patient.id)
+        self.assertEqual([hit['type'] for hit in hits],
+                         ['prescription', 'allergy'])
+        self.assertEqual(hits[0]['record']['id'], str(self.prescription.id))
+        self.assertGreaterEqual(hits[0]['rank'], hits[1]['rank'])
+
+    def test_search_all_terms(self):
+        """Test that every term must match, ignoring query syntax"""
+        hits = self.search(q='rash "amoxicillin"')
+        self.assertEqual([hit['record']['id'] for hit in hits],
+                         [str(self.allergy.id)])
+
+    def test_search_patient_scope(self):
+        """Test that patients only find their own records"""
+        self.client.force_authenticate(user=self.other)
+        hits = self.search(q='amoxicillin')
+        self.assertEqual([hit['type'] for hit in hits], ['visit'])
+
+    def test_search_indexes_updates(self):
+        """Test that updated & deleted records are reindexed"""
+        self.client.patch(prescription_detail(self.prescription.id),
+                          {'medicine': 'Ibuprofen'})
+        self.assertEqual(len(self.search(q='ibuprofen')), 1)
+        self.client.delete(prescription_detail(self.prescription.id))
+        self.assertEqual(self.search(q='ibuprofen'), [])
+
+    def test_search_paginated(self):
+        """Test that hits are paginated by offset"""
+        res = self.client.get(SEARCH_VIEW, {'q': 'amoxicillin',
+                                            'page_size': 2})
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNone(res.data['previous'])
+        res = self.client.get(res.data['next'])
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIsNone(res.data['next'])
+
+    def test_search_requires_query(self):
+        """Test that an empty query is rejected"""
+        res = self.client.get(SEARCH_VIEW)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_patient_invalid(self):
+        """Test that malformed patient ids are rejected"""
+        res = self.client.get(SEARCH_VIEW, {'q': 'rash', 'patient': 'abc'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('patient', res.data)
@@ -21,6 +21,30 @@ router.routes += [
         initkwargs={'suffix': 'View'}
     ),
 
+    # Medical History Export Route
+    Route(
+        url=r'^record{trailing_slash}medical{trailing_slash}history'
+            r'{trailing_slash}export{trailing_slash}$',
+        mapping={
+            'get': 'export_medical_history'
+        },
+        name='medical_history-export',
+        detail=False,
+        initkwargs={'suffix': 'Export'}
+    ),
+
+    # Medical History Bulk Route
+    Route(
+        url=r'^record{trailing_slash}medical{trailing_slash}history'
+            r'{trailing_slash}bulk{trailing_slash}$',
+        mapping={
+            'post': 'bulk_create_medical_history'
+        },
+        name='medical_history-bulk',
+        detail=False,
+        initkwargs={'suffix': 'Bulk'}
+    ),
+
     # Medical History Detail View Route
     Route(
         url=r'^record{trailing_slash}medical{trailing_slash}history'
@@ -47,6 +71,30 @@ router.routes += [
         initkwargs={'suffix': 'View'}
     ),
 
+    # Visit Export Route
+    Route(
+        url=r'^record{trailing_slash}visit{trailing_slash}export'
+            r'{trailing_slash}$',
+        mapping={
+            'get': 'export_visit'
+        },
+        name='visit-export',
+        detail=False,
+        initkwargs={'suffix': 'Export'}
+    ),
+
+    # Visit Bulk Route
+    Route(
+        url=r'^record{trailing_slash}visit{trailing_slash}bulk'
+            r'{trailing_slash}$',
+        mapping={
+            'post': 'bulk_create_visit'
+        },
+        name='visit-bulk',
+        detail=False,
+        initkwargs={'suffix': 'Bulk'}
+    ),
+
     # Visit Detail Route
     Route(
         url=r'^record{trailing_slash}visit{trailing_slash}{lookup}'
@@ -73,6 +121,30 @@ router.routes += [
         initkwargs={'suffix': 'View'}
     ),
 
+    # Prescription Export Route
+    Route(
+        url=r'^record{trailing_slash}prescription{trailing_slash}export'
+            r'{trailing_slash}$',
+        mapping={
+            'get': 'export_prescription'
+        },
+        name='prescription-export',
+        detail=False,
+        initkwargs={'suffix': 'Export'}
+    ),
+
+    # Prescription Bulk Route
+    Route(
+        url=r'^record{trailing_slash}prescription{trailing_slash}bulk'
+            r'{trailing_slash}$',
+        mapping={
+            'post': 'bulk_create_prescription'
+        },
+        name='prescription-bulk',
+        detail=False,
+        initkwargs={'suffix': 'Bulk'}
+    ),
+
     # Prescription Detail Route
     Route(
         url=r'^record{trailing_slash}prescription{trailing_slash}{lookup}'
@@ -99,6 +171,30 @@ router.routes += [
         initkwargs={'suffix': 'View'}
     ),
 
+    # Allergy Export Route
+    Route(
+        url=r'^record{trailing_slash}allergy{trailing_slash}export'
+            r'{trailing_slash}$',
+        mapping={
+            'get': 'export_allergy'
+        },
+        name='allergy-export',
+        detail=False,
+        initkwargs={'suffix': 'Export'}
+    ),
+
+    # Allergy Bulk Route
+    Route(
+        url=r'^record{trailing_slash}allergy{trailing_slash}bulk'
+            r'{trailing_slash}$',
+        mapping={
+            'post': 'bulk_create_allergy'
+        },
+        name='allergy-bulk',
+        detail=False,
+        initkwargs={'suffix': 'Bulk'}
+    ),
+
     # Allergy Detail Route
     Route(
         url=r'^record{trailing_slash}allergy{trailing_slash}{lookup}'
@@ -111,6 +207,39 @@ router.routes += [
         name='allergy-detail',
         detail=True,
         initkwargs={'suffix': 'Detail'}
+    ),
+
+    # Timeline View Route
+    Route(
+        url=r'^record{trailing_slash}timeline{trailing_slash}$',
+        mapping={
+            'get': 'view_timeline'
+        },
+        name='timeline-view',
+        detail=False,
+        initkwargs={'suffix': 'View'}
+    ),
+
+    # Tombstone View Route
+    Route(
+        url=r'^record{trailing_slash}tombstone{trailing_slash}$',
+        mapping={
+            'get': 'view_tombstone'
+        },
+        name='tombstone-view',
+        detail=False,
+        initkwargs={'suffix': 'View'}
+    ),
+
+    # Search View Route
+    Route(
+        url=r'^record{trailing_slash}search{trailing_slash}$',
+        mapping={
+            'get': 'view_search'
+        },
+        name='search-view',
+        detail=False,
+        initkwargs={'suffix': 'View'}
     )
 ]
 
@@ -122,6 +251,9 @@ router.register('record', views.VisitViewSet)
 router.register('record', views.VisitDetailViewSet)
 router.register('record', views.AllergyViewSet)
 router.register('record', views.AllergyDetailViewSet)
+router.register('record', views.TimelineViewSet, basename='timeline')
+router.register('record', views.TombstoneViewSet, basename='tombstone')
+router.register('record', views.SearchViewSet, basename='search')
 
 urlpatterns = [
     path('', include(router.urls)),
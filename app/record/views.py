@@ -1,18 +1,187 @@
+import json
+
+from uuid import UUID
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
+
 from rest_framework import viewsets, mixins, status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-
-from . import serializers
-from core.models import MedicalHistory, Visit, Allergy, Prescription
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import search, serializers
+from core.authentication import CachedTokenAuthentication
+from core.mixins import CachedResponseMixin, ConditionalGetMixin, \
+    SoftDeleteMixin, UpdatedSinceMixin
+from core.models import MedicalHistory, Visit, Allergy, Prescription, \
+    SearchEntry, Tombstone, User
+from core.pagination import KeysetPagination, OffsetPagination
+from core.signals import post_bulk_create
 from core.permissions import IsNotPatient
 
 
+ROLE_FIELDS = ('admin', 'doctor', 'nurse', 'patient')
+
+
+def get_patient_param(request):
+    """Return patient id given by ?patient=, None when missing"""
+    patient_id = request.GET.get('patient', None)
+    if patient_id is None or patient_id == '':
+        return None
+    try:
+        return UUID(patient_id)
+    except ValueError:
+        raise ValidationError({'patient': 'Must be a valid UUID.'})
+
+
+def select_related_users(queryset, expanded_fields=()):
+    """Eager load embedded users along with roles of expanded users"""
+    return queryset.select_related(*serializers.EXPANDABLE_FIELDS, *[
+        f'{user_field}__{role_field}'
+        for user_field in expanded_fields
+        for role_field in ROLE_FIELDS
+    ])
+
+
+class ExportModelMixin:
+    """Stream the whole queryset as newline delimited JSON"""
+
+    export_chunk_size = 2000
+
+    def export(self, request, *args, **kwargs):
+        """Return streaming response of serialized rows"""
+        queryset = self.get_queryset().order_by('created_at', 'id')
+        return StreamingHttpResponse(
+            self.stream_queryset(queryset),
+            content_type='application/x-ndjson'
+        )
+
+    def stream_queryset(self, queryset):
+        """Serialize rows chunk by chunk while iterating the cursor"""
+        chunk = []
+        for instance in queryset.iterator(chunk_size=self.export_chunk_size):
+            chunk.append(instance)
+            if len(chunk) == self.export_chunk_size:
+                yield self.render_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield self.render_chunk(chunk)
+
+    def render_chunk(self, chunk):
+        """Render chunk as one JSON document per line"""
+        serializer = self.get_serializer(chunk, many=True)
+        return ''.join(
+            json.dumps(data, cls=JSONEncoder) + '\n'
+            for data in serializer.data
+        )
+
+
+class BulkCreateModelMixin:
+    """Validate & create a list of rows in a single transaction"""
+
+    bulk_create_max_size = 1000
+
+    def bulk_create(self, request, *args, **kwargs):
+        """Return created rows or errors of every item"""
+        if not isinstance(request.data, list):
+            raise ValidationError({'non_field_errors': [
+                'Expected a list of items.'
+            ]})
+        if len(request.data) > self.bulk_create_max_size:
+            raise ValidationError({'non_field_errors': [
+                f'Expected at most {self.bulk_create_max_size} items.'
+            ]})
+
+        context = self.get_serializer_context()
+        context['patients'] = User.objects.in_bulk(
+            self.get_patient_ids(request.data)
+        )
+        serializer_class = self.get_serializer_class()
+        items = [serializer_class(data=item, context=context)
+                 for item in request.data]
+        if not all([item.is_valid() for item in items]):
+            return Response([item.errors for item in items],
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        instances = self.perform_bulk_create(items)
+        serializer = self.get_serializer(instances, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_bulk_create(self, items):
+        """Insert validated items in batches"""
+        user = self.request.user
+        model = self.get_queryset().model
+        instances = [
+            model(created_by=user, updated_by=user, **item.validated_data)
+            for item in items
+        ]
+        with transaction.atomic():
+            model.objects.bulk_create(instances)
+            search.index_records(instances)
+            post_bulk_create.send(sender=model, instances=instances)
+        return instances
+
+    @staticmethod
+    def get_patient_ids(data):
+        """Return well formed patient ids referenced by items"""
+        patient_ids = set()
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            try:
+                patient_ids.add(UUID(str(item.get('patient_id'))))
+            except ValueError:
+                continue
+        return patient_ids
+
+
+class RecordConditionalGetMixin(ConditionalGetMixin):
+    """Conditional GET also aware of changes to embedded users"""
+
+    conditional_fields = ('updated_at', 'patient__updated_at',
+                          'created_by__updated_at', 'updated_by__updated_at')
+
+
+class RecordListMixin(RecordConditionalGetMixin, CachedResponseMixin,
+                      UpdatedSinceMixin):
+    """Paginated listing of records, conditional & cached when patient
+    scoped"""
+
+    def list_records(self, request):
+        """Return page of records"""
+        queryset = self.get_queryset()
+        if request.user.group == 'patient':
+            patient_id = request.user.id
+        else:
+            patient_id = get_patient_param(request)
+        if not patient_id:
+            return self.get_page_response(queryset)
+        # Validators & cached body come from the same state of the rows
+        state = self.get_conditional_state(queryset)
+        return self.get_conditional_response(
+            request, state, lambda: self.get_cached_response(
+                request, patient_id, state,
+                lambda: self.get_page_response(queryset)
+            ), last_modified=False
+        )
+
+    def get_page_response(self, queryset):
+        """Serialize a single page of queryset"""
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
 class MedicalHistoryViewSet(viewsets.GenericViewSet,
-                            mixins.CreateModelMixin):
+                            mixins.CreateModelMixin,
+                            ExportModelMixin,
+                            BulkCreateModelMixin,
+                            RecordListMixin):
     """View set for MedicalHistory model"""
 
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
 
     permission_classes = [IsAuthenticated, ]
 
@@ -23,31 +192,43 @@ class MedicalHistoryViewSet(viewsets.GenericViewSet,
     def get_queryset(self):
         """Enforce scope"""
         user = self.request.user
-        queryset = super(MedicalHistoryViewSet, self).get_queryset()
+        queryset = select_related_users(
+            super(MedicalHistoryViewSet, self).get_queryset(),
+            serializers.get_expanded_fields(self.request)
+        )
         if user.group == 'patient':
             queryset = queryset.filter(patient=user)
-        patient_id = self.request.GET.get('patient', None)
-        if patient_id is not None and patient_id != '':
+        patient_id = get_patient_param(self.request)
+        if patient_id is not None:
             queryset = queryset.filter(patient__id=patient_id)
-        return queryset.all()
+        return self.filter_updated_since(queryset)
 
     def view_medical_history(self, request, *args, **kwargs):
         """Return medical histories"""
-        serializer = self.get_serializer(self.get_queryset(), many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.list_records(request)
 
     def create_medical_history(self, request, *args, **kwargs):
         """Wrapper around create method for view set distinction"""
         return self.create(request, *args, **kwargs)
 
+    def export_medical_history(self, request, *args, **kwargs):
+        """Wrapper around export method for view set distinction"""
+        return self.export(request, *args, **kwargs)
+
+    def bulk_create_medical_history(self, request, *args, **kwargs):
+        """Wrapper around bulk create method for view set distinction"""
+        return self.bulk_create(request, *args, **kwargs)
+
 
 class MedicalHistoryDetailViewSet(viewsets.GenericViewSet,
                                   mixins.RetrieveModelMixin,
                                   mixins.UpdateModelMixin,
-                                  mixins.DestroyModelMixin):
+                                  SoftDeleteMixin,
+                                  mixins.DestroyModelMixin,
+                                  RecordConditionalGetMixin):
     """Detail view set for Medical History model"""
 
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
 
     permission_classes = [IsAuthenticated, IsNotPatient]
 
@@ -55,17 +236,27 @@ class MedicalHistoryDetailViewSet(viewsets.GenericViewSet,
 
     serializer_class = serializers.MedicalHistorySerializer
 
+    tombstone_type = 'medical_history'
+
     def get_queryset(self):
         """Enforce scope"""
         user = self.request.user
-        queryset = super(MedicalHistoryDetailViewSet, self).get_queryset()
+        queryset = select_related_users(
+            super(MedicalHistoryDetailViewSet, self).get_queryset(),
+            serializers.get_expanded_fields(self.request)
+        )
         if user.group == 'patient':
             queryset = queryset.filter(patient=user)
         return queryset.all()
 
     def view_medical_history_by_id(self, request, *args, **kwargs):
-        """Wrapper around retrieve method for view set distinction"""
-        return self.retrieve(request, *args, **kwargs)
+        """Wrapper around retrieve method, answering conditional GET"""
+        return self.get_conditional_response(
+            request, self.get_conditional_state(
+                self.get_queryset().filter(pk=kwargs['pk'])
+            ),
+            lambda: self.retrieve(request, *args, **kwargs)
+        )
 
     def update_medical_history_by_id(self, request, *args, **kwargs):
         """Wrapper around update method for view set distinction"""
@@ -77,10 +268,13 @@ class MedicalHistoryDetailViewSet(viewsets.GenericViewSet,
 
 
 class VisitViewSet(viewsets.GenericViewSet,
-                   mixins.CreateModelMixin):
+                   mixins.CreateModelMixin,
+                   ExportModelMixin,
+                   BulkCreateModelMixin,
+                   RecordListMixin):
     """View set for Visit model"""
 
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
 
     permission_classes = [IsAuthenticated, ]
 
@@ -91,31 +285,43 @@ class VisitViewSet(viewsets.GenericViewSet,
     def get_queryset(self):
         """Enforce scope"""
         user = self.request.user
-        queryset = super(VisitViewSet, self).get_queryset()
+        queryset = select_related_users(
+            super(VisitViewSet, self).get_queryset(),
+            serializers.get_expanded_fields(self.request)
+        )
         if user.group == 'patient':
             queryset = queryset.filter(patient=user)
-        patient_id = self.request.GET.get('patient', None)
-        if patient_id is not None and patient_id != '':
+        patient_id = get_patient_param(self.request)
+        if patient_id is not None:
             queryset = queryset.filter(patient__id=patient_id)
-        return queryset.all()
+        return self.filter_updated_since(queryset)
 
     def view_visit(self, request, *args, **kwargs):
         """Return visits"""
-        serializer = self.get_serializer(self.get_queryset(), many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.list_records(request)
 
     def create_visit(self, request, *args, **kwargs):
         """Wrapper around create method for view set distinction"""
         return self.create(request, *args, **kwargs)
 
+    def export_visit(self, request, *args, **kwargs):
+        """Wrapper around export method for view set distinction"""
+        return self.export(request, *args, **kwargs)
+
+    def bulk_create_visit(self, request, *args, **kwargs):
+        """Wrapper around bulk create method for view set distinction"""
+        return self.bulk_create(request, *args, **kwargs)
+
 
 class VisitDetailViewSet(viewsets.GenericViewSet,
                          mixins.RetrieveModelMixin,
                          mixins.UpdateModelMixin,
-                         mixins.DestroyModelMixin):
+                         SoftDeleteMixin,
+                         mixins.DestroyModelMixin,
+                         RecordConditionalGetMixin):
     """Detail view set for Visit model"""
 
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
 
     permission_classes = [IsAuthenticated, IsNotPatient]
 
@@ -123,17 +329,27 @@ class VisitDetailViewSet(viewsets.GenericViewSet,
 
     serializer_class = serializers.VisitSerializer
 
+    tombstone_type = 'visit'
+
     def get_queryset(self):
         """Enforce scope"""
         user = self.request.user
-        queryset = super(VisitDetailViewSet, self).get_queryset()
+        queryset = select_related_users(
+            super(VisitDetailViewSet, self).get_queryset(),
+            serializers.get_expanded_fields(self.request)
+        )
         if user.group == 'patient':
             queryset = queryset.filter(patient=user)
         return queryset.all()
 
     def view_visit_by_id(self, request, *args, **kwargs):
-        """Wrapper around retrieve method for view set distinction"""
-        return self.retrieve(request, *args, **kwargs)
+        """Wrapper around retrieve method, answering conditional GET"""
+        return self.get_conditional_response(
+            request, self.get_conditional_state(
+                self.get_queryset().filter(pk=kwargs['pk'])
+            ),
+            lambda: self.retrieve(request, *args, **kwargs)
+        )
 
     def update_visit_by_id(self, request, *args, **kwargs):
         """Wrapper around update method for view set distinction"""
@@ -145,10 +361,13 @@ class VisitDetailViewSet(viewsets.GenericViewSet,
 
 
 class PrescriptionViewSet(viewsets.GenericViewSet,
-                          mixins.CreateModelMixin):
+                          mixins.CreateModelMixin,
+                          ExportModelMixin,
+                          BulkCreateModelMixin,
+                          RecordListMixin):
     """View set for Prescription model"""
 
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
 
     permission_classes = [IsAuthenticated, ]
 
@@ -159,31 +378,43 @@ class PrescriptionViewSet(viewsets.GenericViewSet,
     def get_queryset(self):
         """Enforce scope"""
         user = self.request.user
-        queryset = super(PrescriptionViewSet, self).get_queryset()
+        queryset = select_related_users(
+            super(PrescriptionViewSet, self).get_queryset(),
+            serializers.get_expanded_fields(self.request)
+        )
         if user.group == 'patient':
             queryset = queryset.filter(patient=user)
-        patient_id = self.request.GET.get('patient', None)
-        if patient_id is not None and patient_id != '':
+        patient_id = get_patient_param(self.request)
+        if patient_id is not None:
             queryset = queryset.filter(patient__id=patient_id)
-        return queryset.all()
+        return self.filter_updated_since(queryset)
 
     def view_prescription(self, request, *args, **kwargs):
         """Return prescriptions"""
-        serializer = self.get_serializer(self.get_queryset(), many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.list_records(request)
 
     def create_prescription(self, request, *args, **kwargs):
         """Wrapper around create method for view set distinction"""
         return self.create(request, *args, **kwargs)
 
+    def export_prescription(self, request, *args, **kwargs):
+        """Wrapper around export method for view set distinction"""
+        return self.export(request, *args, **kwargs)
+
+    def bulk_create_prescription(self, request, *args, **kwargs):
+        """Wrapper around bulk create method for view set distinction"""
+        return self.bulk_create(request, *args, **kwargs)
+
 
 class PrescriptionDetailViewSet(viewsets.GenericViewSet,
                                 mixins.RetrieveModelMixin,
                                 mixins.UpdateModelMixin,
-                                mixins.DestroyModelMixin):
+                                SoftDeleteMixin,
+                                mixins.DestroyModelMixin,
+                                RecordConditionalGetMixin):
     """Detail view set for Prescription model"""
 
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
 
     permission_classes = [IsAuthenticated, IsNotPatient]
 
@@ -191,17 +422,27 @@ class PrescriptionDetailViewSet(viewsets.GenericViewSet,
 
     serializer_class = serializers.PrescriptionSerializer
 
+    tombstone_type = 'prescription'
+
     def get_queryset(self):
         """Enforce scope"""
         user = self.request.user
-        queryset = super(PrescriptionDetailViewSet, self).get_queryset()
+        queryset = select_related_users(
+            super(PrescriptionDetailViewSet, self).get_queryset(),
+            serializers.get_expanded_fields(self.request)
+        )
         if user.group == 'patient':
             queryset = queryset.filter(patient=user)
         return queryset.all()
 
     def view_prescription_by_id(self, request, *args, **kwargs):
-        """Wrapper around retrieve method for view set distinction"""
-        return self.retrieve(request, *args, **kwargs)
+        """Wrapper around retrieve method, answering conditional GET"""
+        return self.get_conditional_response(
+            request, self.get_conditional_state(
+                self.get_queryset().filter(pk=kwargs['pk'])
+            ),
+            lambda: self.retrieve(request, *args, **kwargs)
+        )
 
     def update_prescription_by_id(self, request, *args, **kwargs):
         """Wrapper around update method for view set distinction"""
@@ -213,10 +454,13 @@ class PrescriptionDetailViewSet(viewsets.GenericViewSet,
 
 
 class AllergyViewSet(viewsets.GenericViewSet,
-                     mixins.CreateModelMixin):
+                     mixins.CreateModelMixin,
+                     ExportModelMixin,
+                     BulkCreateModelMixin,
+                     RecordListMixin):
     """View set for Allergy model"""
 
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
 
     permission_classes = [IsAuthenticated, ]
 
@@ -227,31 +471,43 @@ class AllergyViewSet(viewsets.GenericViewSet,
     def get_queryset(self):
         """Enforce scope"""
         user = self.request.user
-        queryset = super(AllergyViewSet, self).get_queryset()
+        queryset = select_related_users(
+            super(AllergyViewSet, self).get_queryset(),
+            serializers.get_expanded_fields(self.request)
+        )
         if user.group == 'patient':
             queryset = queryset.filter(patient=user)
-        patient_id = self.request.GET.get('patient', None)
-        if patient_id is not None and patient_id != '':
+        patient_id = get_patient_param(self.request)
+        if patient_id is not None:
             queryset = queryset.filter(patient__id=patient_id)
-        return queryset.all()
+        return self.filter_updated_since(queryset)
 
     def view_allergy(self, request, *args, **kwargs):
         """Return allergies"""
-        serializer = self.get_serializer(self.get_queryset(), many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.list_records(request)
 
     def create_allergy(self, request, *args, **kwargs):
         """Wrapper around create method for view set distinction"""
         return self.create(request, *args, **kwargs)
 
+    def export_allergy(self, request, *args, **kwargs):
+        """Wrapper around export method for view set distinction"""
+        return self.export(request, *args, **kwargs)
+
+    def bulk_create_allergy(self, request, *args, **kwargs):
+        """Wrapper around bulk create method for view set distinction"""
+        return self.bulk_create(request, *args, **kwargs)
+
 
 class AllergyDetailViewSet(viewsets.GenericViewSet,
                            mixins.RetrieveModelMixin,
                            mixins.UpdateModelMixin,
-                           mixins.DestroyModelMixin):
+                           SoftDeleteMixin,
+                           mixins.DestroyModelMixin,
+                           RecordConditionalGetMixin):
     """Detail view set for Allergy model"""
 
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
 
     permission_classes = [IsAuthenticated, IsNotPatient]
 
@@ -259,17 +515,27 @@ class AllergyDetailViewSet(viewsets.GenericViewSet,
 
     serializer_class = serializers.AllergySerializer
 
+    tombstone_type = 'allergy'
+
     def get_queryset(self):
         """Enforce scope"""
         user = self.request.user
-        queryset = super(AllergyDetailViewSet, self).get_queryset()
+        queryset = select_related_users(
+            super(AllergyDetailViewSet, self).get_queryset(),
+            serializers.get_expanded_fields(self.request)
+        )
         if user.group == 'patient':
             queryset = queryset.filter(patient=user)
         return queryset.all()
 
     def view_allergy_by_id(self, request, *args, **kwargs):
-        """Wrapper around retrieve method for view set distinction"""
-        return self.retrieve(request, *args, **kwargs)
+        """Wrapper around retrieve method, answering conditional GET"""
+        return self.get_conditional_response(
+            request, self.get_conditional_state(
+                self.get_queryset().filter(pk=kwargs['pk'])
+            ),
+            lambda: self.retrieve(request, *args, **kwargs)
+        )
 
     def update_allergy_by_id(self, request, *args, **kwargs):
         """Wrapper around update method for view set distinction"""
@@ -278,3 +544,157 @@ class AllergyDetailViewSet(viewsets.GenericViewSet,
     def destroy_allergy_by_id(self, request, *args, **kwargs):
         """Wrapper around delete method for view set distinction"""
         return self.destroy(request, *args, **kwargs)
+
+
+class TimelineViewSet(viewsets.GenericViewSet, UpdatedSinceMixin):
+    """View set for chronological timeline across all records"""
+
+    authentication_classes = [CachedTokenAuthentication, ]
+
+    permission_classes = [IsAuthenticated, ]
+
+    timeline = (
+        ('medical_history', MedicalHistory,
+         serializers.MedicalHistorySerializer),
+        ('visit', Visit, serializers.VisitSerializer),
+        ('prescription', Prescription, serializers.PrescriptionSerializer),
+        ('allergy', Allergy, serializers.AllergySerializer),
+    )
+
+    def get_patient_id(self):
+        """Enforce scope"""
+        user = self.request.user
+        if user.group == 'patient':
+            return user.id
+        patient_id = get_patient_param(self.request)
+        if patient_id is None:
+            raise ValidationError({'patient': 'This parameter is required.'})
+        return patient_id
+
+    def view_timeline(self, request, *args, **kwargs):
+        """Return records of a patient merged in chronological order"""
+        patient_id = self.get_patient_id()
+        expanded_fields = serializers.get_expanded_fields(request)
+        context = self.get_serializer_context()
+
+        record_types = {}
+        querysets = []
+        for record_type, model, serializer_class in self.timeline:
+            record_types[model] = (
+                record_type, serializer_class(context=context)
+            )
+            querysets.append(self.filter_updated_since(select_related_users(
+                model.objects.filter(patient__id=patient_id),
+                expanded_fields
+            )))
+
+        data = []
+        for record in self.paginator.paginate_querysets(querysets, request,
+                                                        self):
+            record_type, serializer = record_types[type(record)]
+            data.append({
+                'type': record_type,
+                'record': serializer.to_representation(record)
+            })
+        return self.get_paginated_response(data)
+
+
+class TombstonePagination(KeysetPagination):
+    """Keyset pagination of tombstones in order of deletion"""
+
+    ordering_field = 'deleted_at'
+
+
+class TombstoneViewSet(viewsets.GenericViewSet, UpdatedSinceMixin):
+    """View set for Tombstone model"""
+
+    authentication_classes = [CachedTokenAuthentication, ]
+
+    permission_classes = [IsAuthenticated, ]
+
+    queryset = Tombstone.objects.all()
+
+    serializer_class = serializers.TombstoneSerializer
+
+    pagination_class = TombstonePagination
+
+    def get_queryset(self):
+        """Enforce scope"""
+        user = self.request.user
+        queryset = super(TombstoneViewSet, self).get_queryset()
+        if user.group == 'patient':
+            queryset = queryset.filter(patient_id=user.id)
+        patient_id = get_patient_param(self.request)
+        if patient_id is not None:
+            queryset = queryset.filter(patient_id=patient_id)
+        return self.filter_updated_since(queryset, 'deleted_at')
+
+    def view_tombstone(self, request, *args, **kwargs):
+        """Return rows deleted since ?updated_since="""
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class SearchViewSet(viewsets.GenericViewSet):
+    """View set for ranked full-text search across all records"""
+
+    authentication_classes = [CachedTokenAuthentication, ]
+
+    permission_classes = [IsAuthenticated, ]
+
+    queryset = SearchEntry.objects.all()
+
+    pagination_class = OffsetPagination
+
+    record_types = TimelineViewSet.timeline
+
+    def get_queryset(self):
+        """Enforce scope"""
+        user = self.request.user
+        queryset = super(SearchViewSet, self).get_queryset()
+        if user.group == 'patient':
+            queryset = queryset.filter(patient=user)
+        patient_id = get_patient_param(self.request)
+        if patient_id is not None:
+            queryset = queryset.filter(patient__id=patient_id)
+        return queryset.all()
+
+    def view_search(self, request, *args, **kwargs):
+        """Return records matching ?q= in order of relevance"""
+        query = request.GET.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This parameter is required.'})
+
+        entries = self.paginate_queryset(search.search(
+            self.get_queryset(), query
+        ).order_by('-rank', '-created_at', '-id'))
+
+        expanded_fields = serializers.get_expanded_fields(request)
+        context = self.get_serializer_context()
+        records = {}
+        serializers_by_type = {}
+        for record_type, model, serializer_class in self.record_types:
+            object_ids = [entry.object_id for entry in entries
+                          if entry.type == record_type]
+            if object_ids:
+                records[record_type] = select_related_users(
+                    model.objects.all(), expanded_fields
+                ).in_bulk(object_ids)
+                serializers_by_type[record_type] = serializer_class(
+                    context=context
+                )
+
+        data = []
+        for entry in entries:
+            record = records[entry.type].get(entry.object_id, None)
+            if record is None:
+                continue
+            data.append({
+                'type': entry.type,
+                'rank': entry.rank,
+                'record': serializers_by_type[entry.type].to_representation(
+                    record
+                )
+            })
+        return self.get_paginated_response(data)
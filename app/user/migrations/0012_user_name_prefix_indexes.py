@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+PREFIX_INDEXES = (
+    ('user_first_name_prefix_idx', 'first_name'),
+    ('user_last_name_prefix_idx', 'last_name'),
+)
+
+
+def create_prefix_indexes(apps, schema_editor):
+    """Index upper cased names for case insensitive prefix lookups
+
+    Matches the UPPER(column::text) LIKE UPPER('term%') issued by
+    istartswith. cnic already carries a pattern index on PostgreSQL.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in PREFIX_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON user_user '
+            f'(UPPER({column}::text) text_pattern_ops)'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    """Drop upper cased name indexes"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in PREFIX_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('user', '0011_auto_20261018_1535'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
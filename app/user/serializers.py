@@ -1,9 +1,11 @@
 from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
 
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 
 from core.models import User, Patient, Nurse, Doctor, Admin
-from core.serializers import ModelBySerializer
+from core.serializers import IdentityMapMixin, ModelBySerializer
 
 
 class PatientSerializer(serializers.ModelSerializer):
@@ -47,20 +49,35 @@ class AdminSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', )
 
 
+ROLE_SERIALIZERS = {
+    'admin': AdminSerializer,
+    'doctor': DoctorSerializer,
+    'nurse': NurseSerializer,
+    'patient': PatientSerializer,
+}
+
+
 class UserSerializer(ModelBySerializer):
     """Serializer for User model"""
 
     role = serializers.SerializerMethodField('get_role')
 
     def get_role(self, obj):
-        if obj.group == 'admin':
-            return AdminSerializer(obj.admin).data
-        elif obj.group == 'doctor':
-            return DoctorSerializer(obj.doctor).data
-        elif obj.group == 'nurse':
-            return NurseSerializer(obj.nurse).data
-        elif obj.group == 'patient':
-            return PatientSerializer(obj.patient).data
+        serializer_class = ROLE_SERIALIZERS.get(obj.group, None)
+        if serializer_class is None:
+            return None
+        role = getattr(obj, obj.group)
+        if role is None:
+            return serializer_class(role).data
+        return self.get_role_serializer(obj.group).to_representation(role)
+
+    def get_role_serializer(self, group):
+        """Return role serializer reused across rows"""
+        if not hasattr(self, '_role_serializers'):
+            self._role_serializers = {}
+        if group not in self._role_serializers:
+            self._role_serializers[group] = ROLE_SERIALIZERS[group]()
+        return self._role_serializers[group]
 
     group = serializers.ChoiceField(
         choices={
@@ -87,6 +104,9 @@ class UserSerializer(ModelBySerializer):
                   'updated_by', 'admin', 'nurse', 'doctor', 'role')
         read_only_fields = ('id', 'created_at', 'updated_at', 'created_by',
                             'updated_by', 'role')
+        extra_kwargs = {'cnic': {'validators': [
+            UniqueValidator(queryset=User.all_objects.all())
+        ]}}
 
     def create(self, validated_data):
         password = validated_data.pop('password')
@@ -96,28 +116,26 @@ class UserSerializer(ModelBySerializer):
         doctor_data = validated_data.pop('doctor', None)
         admin_data = validated_data.pop('admin', None)
 
-        user = super(UserSerializer, self).create(validated_data)
-        user.set_password(password)
-
-        if patient_data is not None and user.group == 'patient':
+        group = validated_data['group']
+        if patient_data is not None and group == 'patient':
             patient_serializer = PatientSerializer(data=patient_data)
             if patient_serializer.is_valid(raise_exception=True):
-                user.patient = patient_serializer.save()
-        elif nurse_data is not None and user.group == 'nurse':
+                validated_data['patient'] = patient_serializer.save()
+        elif nurse_data is not None and group == 'nurse':
             nurse_serializer = NurseSerializer(data=nurse_data)
             if nurse_serializer.is_valid(raise_exception=True):
-                user.nurse = nurse_serializer.save()
-        elif doctor_data is not None and user.group == 'doctor':
+                validated_data['nurse'] = nurse_serializer.save()
+        elif doctor_data is not None and group == 'doctor':
             doctor_serializer = DoctorSerializer(data=doctor_data)
             if doctor_serializer.is_valid(raise_exception=True):
-                user.doctor = doctor_serializer.save()
-        elif admin_data is not None and user.group == 'admin':
+                validated_data['doctor'] = doctor_serializer.save()
+        elif admin_data is not None and group == 'admin':
             admin_serializer = AdminSerializer(data=admin_data)
             if admin_serializer.is_valid(raise_exception=True):
-                user.admin = admin_serializer.save()
+                validated_data['admin'] = admin_serializer.save()
 
-        user.save()
-        return user
+        validated_data['password'] = make_password(password)
+        return super(UserSerializer, self).create(validated_data)
 
     def update(self, instance, validated_data):
         password = validated_data.pop('password', None)
@@ -127,9 +145,9 @@ class UserSerializer(ModelBySerializer):
         doctor_data = validated_data.pop('doctor', None)
         admin_data = validated_data.pop('admin', None)
 
-        user = super(UserSerializer, self).update(instance, validated_data)
         if password is not None:
-            user.set_password(password)
+            validated_data['password'] = make_password(password)
+        user = super(UserSerializer, self).update(instance, validated_data)
 
         if patient_data is not None and user.group == 'patient':
             PatientSerializer(
@@ -148,10 +166,23 @@ class UserSerializer(ModelBySerializer):
                 user.admin, data=admin_data, partial=True
             )
 
-        user.save()
         return user
 
 
+class EmbeddedUserSerializer(IdentityMapMixin, UserSerializer):
+    """Full User serializer embedded in other payloads, once per user"""
+
+
+class UserSummarySerializer(IdentityMapMixin, serializers.ModelSerializer):
+    """Compact serializer for User model embedded in other payloads"""
+
+    class Meta:
+        model = User
+        fields = ('id', 'cnic', 'first_name', 'middle_name', 'last_name',
+                  'group')
+        read_only_fields = fields
+
+
 class AuthTokenSerializer(serializers.Serializer):
     """Custom token authentication serializer"""
     cnic = serializers.CharField()
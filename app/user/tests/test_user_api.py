@@ -1,9 +1,14 @@
+from datetime import timedelta
 from uuid import uuid4
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
 from core import models
@@ -63,10 +68,23 @@ class UserPrivateApiTests(TestCase):
         """Test get method is allowed"""
         res = self.client.get(USER_VIEW)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data[0], serializers.UserSerializer(
+        self.assertEqual(res.data['results'][0], serializers.UserSerializer(
             self.admin
         ).data)
 
+    def test_user_get_queries(self):
+        """Test that users of every group are listed in one query"""
+        for group in ('patient', 'nurse', 'doctor', 'admin'):
+            for index in range(3):
+                utils.sample_user(cnic=f'{group}_{index}', group=group)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(USER_VIEW)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 13)
+        for user in res.data['results']:
+            self.assertIsNotNone(user['role'])
+
     def test_user_post(self):
         """Test post method is allowed"""
         payload = {'cnic': 'test_cnic', 'password': 'testpass',
@@ -77,6 +95,40 @@ class UserPrivateApiTests(TestCase):
             id=res.data['id']
         ).exists())
 
+    def test_user_post_single_write(self):
+        """Test that user & role are created with one write each, besides
+        counting the patient's joining week"""
+        payload = {'cnic': 'test_cnic', 'password': 'testpass',
+                   'group': 'patient', 'patient': {'weight': 60}}
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(USER_VIEW, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        # The first patient of a week misses its UPDATE & is inserted
+        writes = [query['sql'] for query in queries
+                  if query['sql'].split()[0] in ('INSERT', 'UPDATE')]
+        self.assertEqual(len(writes), 4, writes)
+        self.assertEqual(len([sql for sql in writes if 'analytics_' in sql]),
+                         2, writes)
+
+        user = models.User.objects.get(id=res.data['id'])
+        self.assertTrue(user.check_password(payload['password']))
+        self.assertEqual(user.patient.weight, 60)
+        self.assertEqual(user.created_by, self.admin)
+
+    def test_user_detail_patch_password(self):
+        """Test that password update is a single write"""
+        payload = {'password': 'newpass'}
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(user_detail(self.admin.id), payload)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        writes = [query['sql'] for query in queries
+                  if query['sql'].split()[0] in ('INSERT', 'UPDATE')]
+        self.assertEqual(len(writes), 1, writes)
+        self.admin.refresh_from_db()
+        self.assertTrue(self.admin.check_password(payload['password']))
+
     def test_user_detail_get(self):
         """Test get method is allowed"""
         res = self.client.get(user_detail(self.admin.id))
@@ -99,3 +151,63 @@ class UserPrivateApiTests(TestCase):
         self.assertFalse(models.User.objects.filter(
             id=self.admin.id
         ).exists())
+
+    def test_user_get_updated_since(self):
+        """Test that only users changed since timestamp are listed"""
+        since = timezone.now()
+        models.User.objects.filter(id=self.admin.id).update(
+            updated_at=since - timedelta(days=1)
+        )
+        patient = utils.sample_user(cnic='sample_patient', group='patient')
+
+        res = self.client.get(USER_VIEW, {'updated_since': since.isoformat()})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([user['id'] for user in res.data['results']],
+                         [str(patient.id)])
+
+    def test_user_detail_delete_tombstone(self):
+        """Test that deleted patients leave a tombstone they own"""
+        patient = utils.sample_user(cnic='sample_patient', group='patient')
+        res = self.client.delete(user_detail(patient.id))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(models.Tombstone.objects.filter(
+            type='user', object_id=patient.id, patient_id=patient.id
+        ).exists())
+
+    def test_user_detail_delete_soft(self):
+        """Test that deleted users are deactivated & lose their tokens"""
+        patient = utils.sample_user(cnic='sample_patient', group='patient')
+        Token.objects.create(user=patient)
+        res = self.client.delete(user_detail(patient.id))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        patient = models.User.all_objects.get(id=patient.id)
+        self.assertIsNotNone(patient.deleted_at)
+        self.assertFalse(patient.is_active)
+        self.assertFalse(Token.objects.filter(user=patient).exists())
+
+        payload = {'cnic': 'sample_patient', 'password': 'testpass',
+                   'group': 'patient'}
+        res = self.client.post(USER_VIEW, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_get_search(self):
+        """Test that users are looked up by cnic & name prefixes"""
+        john = utils.sample_user(cnic='35202-111', group='patient',
+                                 first_name='John', last_name='Smith')
+        jane = utils.sample_user(cnic='35202-222', group='patient',
+                                 first_name='Jane', last_name='Smithson')
+        utils.sample_user(cnic='42101-333', group='patient',
+                          first_name='Ali', last_name='Khan')
+
+        def lookup(**params):
+            res = self.client.get(USER_VIEW, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            return {user['id'] for user in res.data['results']}
+
+        self.assertEqual(lookup(q='smi'), {str(john.id), str(jane.id)})
+        self.assertEqual(lookup(q='j smithson'), {str(jane.id)})
+        self.assertEqual(lookup(q='35202-1'), {str(john.id)})
+        self.assertEqual(lookup(cnic_prefix='35202'),
+                         {str(john.id), str(jane.id)})
+        self.assertEqual(lookup(q='mith'), set())
@@ -1,20 +1,31 @@
-from rest_framework import viewsets, mixins, status
+from django.db.models import Q
+
+from rest_framework import viewsets, mixins
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.response import Response
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
 from . import serializers
-from core.models import User
+from core.authentication import CachedTokenAuthentication, \
+    invalidate_user_tokens
+from core.mixins import SoftDeleteMixin, UpdatedSinceMixin
+from core.models import Allergy, MedicalHistory, Prescription, \
+    SearchEntry, User, Visit
 from core.permissions import check_permission, IsAdmin
 
 
+ROLE_FIELDS = tuple(serializers.ROLE_SERIALIZERS)
+
+RECORD_MODELS = (MedicalHistory, Visit, Prescription, Allergy)
+
+
 class UserViewSet(viewsets.GenericViewSet,
-                  mixins.CreateModelMixin):
+                  mixins.CreateModelMixin,
+                  UpdatedSinceMixin):
     """View set for User model"""
 
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
 
     permission_classes = [IsAuthenticated, ]
 
@@ -52,12 +63,24 @@ class UserViewSet(viewsets.GenericViewSet,
                 queryset = queryset.filter(id=user.id)
             elif user_type == 'patient':
                 queryset = queryset.filter(group='patient')
-        return queryset.all()
+
+        for term in self.request.GET.get('q', '').split():
+            queryset = queryset.filter(
+                Q(cnic__startswith=term) |
+                Q(first_name__istartswith=term) |
+                Q(last_name__istartswith=term)
+            )
+        cnic_prefix = self.request.GET.get('cnic_prefix', None)
+        if cnic_prefix is not None and cnic_prefix != '':
+            queryset = queryset.filter(cnic__startswith=cnic_prefix)
+        queryset = self.filter_updated_since(queryset)
+        return queryset.select_related(*ROLE_FIELDS)
 
     def view_user(self, request, *args, **kwargs):
         """Return users"""
-        serializer = self.get_serializer(self.get_queryset(), many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def create_user(self, request, *args, **kwargs):
         """Wrapper around create method for view set distinction"""
@@ -67,10 +90,11 @@ class UserViewSet(viewsets.GenericViewSet,
 class UserDetailViewSet(viewsets.GenericViewSet,
                         mixins.UpdateModelMixin,
                         mixins.RetrieveModelMixin,
+                        SoftDeleteMixin,
                         mixins.DestroyModelMixin):
     """Detail view set for User model"""
 
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
 
     permission_classes = [IsAuthenticated, ]
 
@@ -78,6 +102,8 @@ class UserDetailViewSet(viewsets.GenericViewSet,
 
     serializer_class = serializers.UserSerializer
 
+    tombstone_type = 'user'
+
     def get_queryset(self):
         """Enforce scope"""
         user = self.request.user
@@ -91,7 +117,42 @@ class UserDetailViewSet(viewsets.GenericViewSet,
             queryset = queryset.filter(
                 patient__isnull=False
             )
-        return queryset.all()
+        return queryset.select_related(*ROLE_FIELDS)
+
+    def perform_update(self, serializer):
+        """Evict cached credentials of updated user"""
+        super(UserDetailViewSet, self).perform_update(serializer)
+        invalidate_user_tokens(serializer.instance)
+
+    def perform_destroy(self, instance):
+        """Deactivate destroyed user & revoke its credentials"""
+        invalidate_user_tokens(instance)
+        Token.objects.filter(user=instance).delete()
+        instance.is_active = False
+        super(UserDetailViewSet, self).perform_destroy(instance)
+
+    def get_soft_delete_fields(self, instance):
+        """Persist deactivation along with soft delete"""
+        return super(UserDetailViewSet, self).get_soft_delete_fields(
+            instance
+        ) + ['is_active']
+
+    def soft_delete_dependents(self, instance):
+        """Records of a deleted patient are deleted along with it, after
+        rollups uncounted them"""
+        if instance.group != 'patient':
+            return
+        for model in RECORD_MODELS:
+            model.objects.filter(patient=instance).update(
+                deleted_at=instance.deleted_at, updated_at=instance.deleted_at
+            )
+        SearchEntry.objects.filter(patient=instance).delete()
+
+    def get_tombstone_patient_id(self, instance):
+        """Patients own their own tombstone, staff tombstones are global"""
+        if instance.group == 'patient':
+            return instance.id
+        return None
 
     def view_user_by_id(self, request, *args, **kwargs):
         """Wrapper around retrieve method for view set distinction"""
@@ -112,3 +173,11 @@ class AuthTokenViewSet(ObtainAuthToken):
 
     serializer_class = serializers.AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+
+    def post(self, request, *args, **kwargs):
+        """Issue token, letting its first reads see it on primary"""
+        response = super(AuthTokenViewSet, self).post(request, *args,
+                                                      **kwargs)
+        response.issued_credentials = \
+            f'{CachedTokenAuthentication.keyword} {response.data["token"]}'
+        return response